@@ -0,0 +1,45 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.arabic_normalization import fold_tokens, normalize_text  # noqa: E402
+
+# Normalization of a large generated corpus of diacritized Arabic: sinatools' arStrip called once per
+# token (before) against the whole-document passes of utils/arabic_normalization (after). Needs sinatools.
+
+WORDS = ["كِتَابٌ", "الْفَاتُورَةُ", "إِلْغَاءُ", "الاشْتِرَاكِ", "مُشْكِلَةٌ", "الرَّصِيدُ", "أَسْبُوعٍ", "مَكْتَبَةٌ",
+         "شُكْرًا", "خِدْمَةُ", "العُمَلَاءِ", "آخِرُ", "مُسْتَشْفَى", "٢٠٢٤", "الـــهاتف", "؟", "،"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole-document normalization against per-token arStrip.")
+    parser.add_argument("--tokens", type=int, default=1000000, help="Tokens in the generated corpus")
+    args = parser.parse_args()
+
+    from sinatools.utils.parser import arStrip
+
+    generator = random.Random(0)
+    tokens = generator.choices(WORDS, k=args.tokens)
+    text = " ".join(tokens)
+    print(f"{len(tokens)} tokens, {len(text) / 1e6:.1f} M characters")
+
+    start = time.perf_counter()
+    [arStrip(text=token) for token in tokens]
+    before = time.perf_counter() - start
+    print(f"before: {before:8.2f} s (arStrip per token)")
+
+    start = time.perf_counter()
+    normalized_text = normalize_text(text)
+    normalize_time = time.perf_counter() - start
+    fold_tokens(normalized_text.split(" "))
+    after = time.perf_counter() - start
+    print(f" after: {after:8.2f} s (normalize_text {normalize_time:.2f} s, "
+          f"fold_tokens {after - normalize_time:.2f} s), {before / after:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+
+from utils.asr_backends import get_asr_backend  # noqa: E402
+from utils.audio_preprocessing import EXPORT_FORMATS, prepared_audio_file  # noqa: E402
+
+# Bytes sent and latency per upload format: the original file against the 16 kHz mono copies.
+# Upload time is estimated from --uplink-mbps; with --asr-backend every copy is also transcribed
+# and the end-to-end time (preparation + ASR) is measured. Needs ffmpeg for formats other than WAV.
+
+
+def measure(file_path, audio_format, uplink_mbps, asr_backend):
+    start = time.perf_counter()
+    with prepared_audio_file(file_path, audio_format) as prepared_file_path:
+        prepare_seconds = time.perf_counter() - start
+        size = os.path.getsize(prepared_file_path)
+        kept_original = audio_format is not None and prepared_file_path == file_path
+
+        asr_seconds = None
+        if asr_backend is not None:
+            asr_start = time.perf_counter()
+            asr_backend.transcribe([prepared_file_path])
+            asr_seconds = time.perf_counter() - asr_start
+
+    return {
+        "format": (audio_format or "original") + (" (original kept)" if kept_original else ""),
+        "bytes": size,
+        "prepare_seconds": prepare_seconds,
+        "upload_seconds": size * 8 / (uplink_mbps * 1e6),
+        "asr_seconds": asr_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes sent and latency of the audio upload formats.")
+    parser.add_argument("files", nargs="+", help="Audio files to prepare")
+    parser.add_argument("--formats", nargs="+", default=["original"] + sorted(EXPORT_FORMATS),
+                        help="Formats to compare, 'original' sends the file as it is")
+    parser.add_argument("--uplink-mbps", type=float, default=10, help="Upload bandwidth used to estimate upload time")
+    parser.add_argument("--asr-backend", help="Also transcribe every copy with this backend (e.g. nlpcloud)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    asr_backend = get_asr_backend(args.asr_backend) if args.asr_backend else None
+    for file_path in args.files:
+        print(file_path)
+        for audio_format in args.formats:
+            result = measure(file_path, None if audio_format == "original" else audio_format, args.uplink_mbps,
+                             asr_backend)
+            line = (f"  {result['format']:<24} {result['bytes'] / 1e6:9.2f} MB"
+                    f"  prepare {result['prepare_seconds']:6.2f} s  upload ~{result['upload_seconds']:7.2f} s")
+            if result["asr_seconds"] is not None:
+                total_seconds = result["prepare_seconds"] + result["asr_seconds"]
+                line += f"  ASR {result['asr_seconds']:7.2f} s  end-to-end {total_seconds:7.2f} s"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
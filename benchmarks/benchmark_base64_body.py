@@ -0,0 +1,94 @@
+import argparse
+import base64
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.utils import Base64JsonBody  # noqa: E402
+
+# Peak RSS of building the NLP Cloud ASR request body for one recording, before (whole file read and
+# encoded in memory) and after (Base64JsonBody read chunk by chunk, the way requests sends it).
+# Every mode runs in its own process so the peaks don't mix.
+
+
+def write_silent_wav(path, seconds, frame_rate=44100, channels=2):
+    frame = b"\x00\x00" * channels
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(frame_rate)
+        for _ in range(seconds):
+            wav_file.writeframes(frame * frame_rate)
+
+
+def build_body_in_memory(file_path):
+    # What generate_speech_to_text_from_local_file did before streaming
+    with open(file_path, "rb") as binary_file:
+        binary_file_data = binary_file.read()
+    base64_encoded_data = base64.b64encode(binary_file_data)
+    base64_output = base64_encoded_data.decode("utf-8")
+    body = json.dumps({"input_language": "ar", "encoded_file": base64_output}).encode("utf-8")
+    return len(body)
+
+
+def build_body_streamed(file_path):
+    body_size = 0
+    with Base64JsonBody(file_path, "encoded_file", {"input_language": "ar"}) as body:
+        for data in body:
+            body_size += len(data)
+    return body_size
+
+
+MODES = {"before": build_body_in_memory, "after": build_body_streamed}
+
+
+def run_mode(mode, file_path):
+    start = time.perf_counter()
+    body_size = MODES[mode](file_path)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    print(json.dumps({"mode": mode, "body_mb": body_size / 1e6, "peak_rss_mb": peak_rss_mb, "seconds": elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of the ASR request body, in memory vs streamed.")
+    parser.add_argument("file", nargs="?", help="Audio file, a silent 44.1 kHz stereo WAV is generated by default")
+    parser.add_argument("--seconds", type=int, default=3600, help="Length of the generated WAV")
+    parser.add_argument("--mode", choices=sorted(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.file)
+        return
+
+    temporary_directory = None
+    file_path = args.file
+    if file_path is None:
+        temporary_directory = tempfile.TemporaryDirectory()
+        file_path = os.path.join(temporary_directory.name, "benchmark.wav")
+        write_silent_wav(file_path, args.seconds)
+
+    try:
+        print(f"{file_path}: {os.path.getsize(file_path) / 1e6:.1f} MB")
+        for mode in ("before", "after"):
+            output = subprocess.run([sys.executable, __file__, file_path, "--mode", mode],
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output)
+            print(f"{mode:>6}: peak RSS {result['peak_rss_mb']:8.1f} MB, "
+                  f"body {result['body_mb']:8.1f} MB, {result['seconds']:.2f} s")
+    finally:
+        if temporary_directory is not None:
+            temporary_directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
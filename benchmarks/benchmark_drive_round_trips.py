@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import resumable_upload  # noqa: E402
+from utils.google_drive_api import GoogleDriveApi  # noqa: E402
+
+# Round trips per uploaded file against a local fake Drive endpoint, before (credentials, discovery
+# document and service built for every upload, one permission request per file) and after (one shared
+# client, permissions granted through the batch endpoint). Needs google-api-python-client.
+
+GOOGLE_APIS_URL = "https://www.googleapis.com/"
+
+
+class FakeDrive(BaseHTTPRequestHandler):
+    # Just enough of the token, discovery, resumable upload, permissions and batch endpoints
+    protocol_version = "HTTP/1.1"
+    requests = Counter()
+    uploads = {}
+    lock = threading.Lock()
+    discovery_document = None
+
+    def log_message(self, *args):
+        pass
+
+    def count(self, kind):
+        with self.lock:
+            self.requests[kind] += 1
+
+    def respond(self, status, body=b"", headers=None, content_type="application/json"):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        self.count("discovery")
+        self.respond(200, self.discovery_document.encode("utf-8"))
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        body = self.read_body()
+        if path == "/token":
+            self.count("token")
+            self.respond(200, json.dumps({"access_token": "fake", "expires_in": 3600}).encode("utf-8"))
+        elif path == "/upload/drive/v3/files":
+            self.count("upload")
+            with self.lock:
+                upload_id = str(len(self.uploads) + 1)
+                self.uploads[upload_id] = bytearray()
+            self.respond(200, headers={"Location": f"http://{self.headers['Host']}/upload/session/{upload_id}"})
+        elif path == "/batch/drive/v3":
+            self.count("batch")
+            self.respond_batch(body)
+        elif path.endswith("/permissions"):
+            self.count("permission")
+            self.respond(200, b"{}")
+        else:
+            self.respond(404)
+
+    def do_PUT(self):
+        self.count("upload")
+        upload_id = urlsplit(self.path).path.rsplit("/", 1)[1]
+        data = self.read_body()
+        total = self.headers["Content-Range"].rsplit("/", 1)[1]
+        upload = self.uploads[upload_id]
+        upload.extend(data)
+        if len(upload) < int(total):
+            self.respond(308, headers={"Range": f"bytes=0-{len(upload) - 1}"})
+        else:
+            file_info = {"id": upload_id, "md5Checksum": hashlib.md5(upload).hexdigest()}
+            self.respond(200, json.dumps(file_info).encode("utf-8"))
+
+    def respond_batch(self, body):
+        # One application/http part per request, answered in the same order with the matching Content-ID
+        boundary = "batch_response"
+        parts = []
+        for line in body.decode("utf-8").splitlines():
+            if line.lower().startswith("content-id:"):
+                content_id = line.split(":", 1)[1].strip().strip("<>")
+                parts.append(
+                    f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                    "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{}\r\n"
+                )
+        response = "".join(parts) + f"--{boundary}--\r\n"
+        self.respond(200, response.encode("utf-8"), content_type=f"multipart/mixed; boundary={boundary}")
+
+
+def get_credentials(base_url):
+    from google.oauth2.credentials import Credentials
+
+    return Credentials(None, refresh_token="fake", token_uri=base_url + "token", client_id="fake",
+                       client_secret="fake")
+
+
+def upload_before(file_paths, base_url, chunk_size):
+    # The flow replaced by the shared client: everything is set up again for every file
+    from google.auth.transport.requests import AuthorizedSession, Request
+    from googleapiclient.discovery import build
+
+    for file_path in file_paths:
+        credentials = get_credentials(base_url)
+        credentials.refresh(Request())
+        service = build("drive", "v3", credentials=credentials, static_discovery=False, cache_discovery=False,
+                        discoveryServiceUrl=base_url + "discovery/v1/apis/{api}/{apiVersion}/rest")
+        upload = resumable_upload.ResumableDriveUpload(AuthorizedSession(credentials), chunk_size)
+        uploaded_file = upload.upload(file_path, {"name": os.path.basename(file_path)}, "audio/wav")
+        service.permissions().create(fileId=uploaded_file["id"], body={"role": "reader", "type": "anyone"}).execute()
+
+
+def upload_after(file_paths, base_url, chunk_size):
+    GoogleDriveApi._credentials = get_credentials(base_url)
+    GoogleDriveApi._discovery_document = FakeDrive.discovery_document
+    GoogleDriveApi.upload_audio_files_to_google_drive(file_paths, audio_format=None, chunk_size=chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google Drive round trips per uploaded file, before and after.")
+    parser.add_argument("--files", type=int, default=50, help="Files to upload")
+    parser.add_argument("--file-size", type=int, default=512 * 1024, help="Bytes per file")
+    parser.add_argument("--chunk-size", type=int, default=256 * 1024, help="Resumable upload chunk size")
+    args = parser.parse_args()
+
+    from googleapiclient.discovery_cache import get_static_doc
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeDrive)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    FakeDrive.discovery_document = get_static_doc("drive", "v3").replace(GOOGLE_APIS_URL, base_url)
+    resumable_upload.DRIVE_UPLOAD_URL = base_url + "upload/drive/v3/files"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_paths = []
+        for index in range(args.files):
+            file_path = os.path.join(directory, f"recording_{index}.wav")
+            with open(file_path, "wb") as binary_file:
+                binary_file.write(os.urandom(args.file_size))
+            file_paths.append(file_path)
+
+        # Upload sessions are saved under the temporary directory, apart from the real ones
+        resumable_upload.DEFAULT_SESSIONS_PATH = os.path.join(directory, "upload_sessions.json")
+
+        for name, upload in (("before", upload_before), ("after", upload_after)):
+            FakeDrive.requests.clear()
+            upload(file_paths, base_url, args.chunk_size)
+            total = sum(FakeDrive.requests.values())
+            details = ", ".join(f"{kind} {count}" for kind, count in sorted(FakeDrive.requests.items()))
+            print(f"{name:>6}: {total / args.files:.2f} round trips per file ({details})")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
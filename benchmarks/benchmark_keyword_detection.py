@@ -0,0 +1,90 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.arabic_normalization import fold_text, fold_tokens  # noqa: E402
+from utils.keyword_detection import KeywordAutomaton, load_keyword_automaton  # noqa: E402
+
+# Keyword detection over a generated lexicon of 100k terms (single lemmas and phrases of up to 3):
+# compiling the automaton, loading it back from the disk cache, and detecting in a long transcript,
+# against the list scan it replaced (every term looked for at every position), which is timed on a
+# sample of the terms and scaled to the whole lexicon.
+
+LETTERS = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+
+
+def generate_words(count, generator):
+    words = set()
+    while len(words) < count:
+        words.add("".join(generator.choices(LETTERS, k=generator.randint(3, 7))))
+    return sorted(words)
+
+
+def generate_terms(words, count, generator):
+    terms = set()
+    while len(terms) < count:
+        terms.add(" ".join(generator.choices(words, k=generator.choice((1, 1, 2, 3)))))
+    return sorted(terms)
+
+
+def scan_terms(terms, lemmas):
+    # The list scan: every term compared with the lemmas at every position
+    detected_terms = {}
+    for term in terms:
+        term_lemmas = fold_text(term).split()
+        for start in range(len(lemmas) - len(term_lemmas) + 1):
+            if lemmas[start:start + len(term_lemmas)] == term_lemmas:
+                detected_terms[term] = detected_terms.get(term, 0) + 1
+    return detected_terms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword detection with the Aho-Corasick automaton at 100k terms.")
+    parser.add_argument("--terms", type=int, default=100000, help="Terms in the generated lexicon")
+    parser.add_argument("--words", type=int, default=50000, help="Distinct words the terms are made of")
+    parser.add_argument("--lemmas", type=int, default=20000, help="Lemmas in the generated transcript")
+    parser.add_argument("--scan-sample", type=int, default=200, help="Terms timed with the list scan")
+    args = parser.parse_args()
+
+    generator = random.Random(0)
+    words = generate_words(args.words, generator)
+    terms = generate_terms(words, args.terms, generator)
+    lemmas = fold_tokens(generator.choices(words, k=args.lemmas))
+    print(f"{len(terms)} terms, {len(lemmas)} lemmas")
+
+    with tempfile.TemporaryDirectory() as directory:
+        lexicon_path = os.path.join(directory, "lexicon.txt")
+        with open(lexicon_path, "w", encoding="utf-8") as lexicon_file:
+            lexicon_file.write("\n".join(terms))
+
+        start = time.perf_counter()
+        automaton = load_keyword_automaton(lexicon_path, directory)
+        print(f"compile:           {time.perf_counter() - start:8.3f} s")
+        start = time.perf_counter()
+        load_keyword_automaton(lexicon_path, directory)
+        print(f"load from cache:   {time.perf_counter() - start:8.3f} s")
+
+    start = time.perf_counter()
+    detected_terms = automaton.detect(lemmas)
+    detect_time = time.perf_counter() - start
+    print(f"automaton detect:  {detect_time:8.3f} s, {len(detected_terms)} terms found")
+
+    sample = terms[:args.scan_sample]
+    start = time.perf_counter()
+    scanned_terms = scan_terms(sample, lemmas)
+    scan_time = (time.perf_counter() - start) * len(terms) / len(sample)
+    print(f"list scan:         {scan_time:8.3f} s (scaled from {len(sample)} terms), "
+          f"{scan_time / detect_time:.0f}x slower")
+
+    # Both find the same occurrences of the sampled terms
+    sample_counts = {term: found["count"] for term, found in KeywordAutomaton(sample).detect(lemmas).items()}
+    assert sample_counts == scanned_terms
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import lemma_cache  # noqa: E402
+from utils.sina_tools_api import SinaToolsApi  # noqa: E402
+
+# Lemmatization time over a corpus of repetitive support calls, every transcript analyzed in full (before)
+# and through the per-token lemma cache (after), with the cache's hit rate. Needs sinatools.
+
+# Generated calls are made of these phrases, like real calls that keep repeating the same requests
+PHRASES = [
+    "السلام عليكم معك خدمة العملاء كيف أقدر أساعدك",
+    "عندي مشكلة في الفاتورة الشهرية ولم يصلني الرصيد",
+    "أريد إلغاء الاشتراك وتحويل الخط إلى باقة أخرى",
+    "الإنترنت ينقطع كل يوم في المساء منذ أسبوع",
+    "تم تسجيل طلبك وسيتواصل معك الفني خلال يومين",
+    "هل يمكنك تأكيد رقم الهوية ورقم الجوال المسجل",
+    "شكرا لتواصلك معنا ونتمنى لك يوما سعيدا",
+    "المبلغ خصم مرتين من البطاقة وأريد استرجاعه",
+]
+
+
+def generate_calls(count, phrases_per_call, seed=0):
+    generator = random.Random(seed)
+    return [" ".join(generator.choices(PHRASES, k=phrases_per_call)) for _ in range(count)]
+
+
+def read_calls(file_paths):
+    calls = []
+    for file_path in file_paths:
+        with open(file_path, encoding="utf-8") as text_file:
+            calls.append(text_file.read())
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lemmatization speedup of the per-token lemma cache.")
+    parser.add_argument("files", nargs="*", help="Transcripts to lemmatize, generated calls are used otherwise")
+    parser.add_argument("--calls", type=int, default=200, help="Generated calls")
+    parser.add_argument("--phrases-per-call", type=int, default=20, help="Phrases per generated call")
+    args = parser.parse_args()
+
+    calls = read_calls(args.files) if args.files else generate_calls(args.calls, args.phrases_per_call)
+    print(f"{len(calls)} calls, {sum(len(call.split()) for call in calls)} words")
+    # sinatools loads its dictionaries before timing
+    SinaToolsApi.warm_up()
+
+    start = time.perf_counter()
+    analyzed_lemmas = [SinaToolsApi.analyze(call) for call in calls]
+    before = time.perf_counter() - start
+    print(f"before: {before:8.2f} s")
+
+    lemma_cache._lemma_cache = lemma_cache.LemmaCache()
+    start = time.perf_counter()
+    cached_lemmas = [SinaToolsApi.get_lemmas(call) for call in calls]
+    after = time.perf_counter() - start
+    stats = lemma_cache._lemma_cache.get_stats()
+    print(f" after: {after:8.2f} s, {before / after:.1f}x faster, hit rate {stats['hit_rate']:.1%}, "
+          f"{stats['entries']} cached tokens")
+
+    # Out of context a token can get another lemma than within its sentence
+    lemma_count = sum(len(lemmas) for lemmas in analyzed_lemmas)
+    same_count = sum(before_lemma == after_lemma for before_lemmas, after_lemmas in zip(analyzed_lemmas, cached_lemmas)
+                     for before_lemma, after_lemma in zip(before_lemmas, after_lemmas))
+    print(f"same lemma as the full analysis for {same_count / lemma_count:.1%} of {lemma_count} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.asr_backends import (  # noqa: E402
+    WHISPER_WINDOW_MS,
+    _init_whisper_worker,
+    _transcribe_batch_with_whisper,
+    _transcribe_with_whisper,
+)
+from utils.audio_chunking import export_audio_chunk, get_chunk_windows  # noqa: E402
+
+# Real-time factor (decoding time / audio time, lower is faster) of local Whisper on CPU. Every run decodes
+# the same 30 s segments: the batch sizes all go through the batched decode (no timestamps, no temperature
+# fallback), batch size 1 included, so they only differ by batching. model.transcribe, which the backend
+# uses without batching, is reported on the same segments as a separate baseline.
+# Needs openai-whisper, torch and ffmpeg.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Real-time factor of batched local Whisper decoding.")
+    parser.add_argument("files", nargs="+", help="Arabic recordings, cut into 30 s segments")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8, 16])
+    parser.add_argument("--model", default="turbo", help="Whisper model name")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="torch CPU threads")
+    parser.add_argument("--language", default="ar")
+    args = parser.parse_args()
+
+    from pydub import AudioSegment
+
+    segment_paths = []
+    audio_seconds = 0
+    try:
+        for file_path in args.files:
+            audio = AudioSegment.from_file(file_path)
+            audio_seconds += len(audio) / 1000
+            for window in get_chunk_windows(len(audio), WHISPER_WINDOW_MS, 0):
+                segment_paths.append(export_audio_chunk(audio, [window], "wav"))
+        print(f"{len(args.files)} recordings, {len(segment_paths)} segments, {audio_seconds:.0f} s of audio")
+
+        # The model is loaded and torch warmed up on one segment before timing
+        _init_whisper_worker(args.model, args.threads)
+        _transcribe_batch_with_whisper(segment_paths[:1], args.model, args.language)
+
+        start = time.perf_counter()
+        for segment_path in segment_paths:
+            _transcribe_with_whisper(segment_path, args.model, args.language)
+        elapsed = time.perf_counter() - start
+        print(f"model.transcribe:  {elapsed:8.1f} s, real-time factor {elapsed / audio_seconds:.3f} (baseline)")
+
+        for batch_size in args.batch_sizes:
+            start = time.perf_counter()
+            for batch_start in range(0, len(segment_paths), batch_size):
+                _transcribe_batch_with_whisper(segment_paths[batch_start:batch_start + batch_size], args.model,
+                                               args.language)
+            elapsed = time.perf_counter() - start
+            print(f"batch size {batch_size:>3}:    {elapsed:8.1f} s, real-time factor {elapsed / audio_seconds:.3f}")
+    finally:
+        for segment_path in segment_paths:
+            os.remove(segment_path)
+
+
+if __name__ == "__main__":
+    main()
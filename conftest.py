@@ -0,0 +1 @@
+# Makes the repository root importable (utils.*) when the tests are run with plain `pytest`
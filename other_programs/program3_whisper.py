@@ -2,9 +2,6 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 import threading
 
-import torch
-import whisper
-
 
 class SpeechToTextApp:
     def __init__(self, root):
@@ -29,6 +26,7 @@ class SpeechToTextApp:
         self.download_button.pack(pady=10)
 
         self.wav_file = None
+        self.model = None
         self.transcribed_text = None
         self.export_path = "transcribed_text.txt"
 
@@ -54,8 +52,12 @@ class SpeechToTextApp:
             self.progress_label.config(text="Processing... Please wait.")
             # device = 'cuda' if torch.cuda.is_available() else 'cpu'
             # model = whisper.load_model('turbo').to(device)
-            model = whisper.load_model("turbo")
-            result = model.transcribe(self.wav_file, fp16=False)
+            # Load the weights on the first file only and keep the model for the next ones
+            if self.model is None:
+                import whisper
+
+                self.model = whisper.load_model("turbo")
+            result = self.model.transcribe(self.wav_file, fp16=False)
             self.transcribed_text = result["text"]
 
             # Update the UI with the result
@@ -1,14 +1,10 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
+from tkinter import filedialog, ttk
 import threading
-import json
 import os
-import base64
 from dotenv import load_dotenv
-import nlpcloud
-from pydub import AudioSegment
-from sinatools.morphology import morph_analyzer
-from sinatools.utils.parser import arStrip
+from utils.pipeline import SpeechToTextPipeline
+from utils.utils import save_result_to_local_file
 
 
 class SpeechToTextApp:
@@ -54,30 +50,27 @@ class SpeechToTextApp:
         self.retry_button.pack_forget()
         self.upload_button.config(state="normal")
 
-    def get_audio_duration(self, file_path):
-        try:
-            audio = AudioSegment.from_file(file_path)
-            duration_seconds = audio.duration_seconds
-
-            return duration_seconds
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get audio duration: {e}")
-            return None
-
     def upload_file(self):
         self.wav_file = filedialog.askopenfilename(filetypes=[("WAV Files", "*.wav"), ("MP3 Files", "*.mp3")])
         if self.wav_file:
-            # Validate file duration (replace with actual duration check if required)
-            duration_of_sound_file = self.get_audio_duration(self.wav_file)
-            if duration_of_sound_file and duration_of_sound_file > 200:
-                messagebox.showerror("Error", "File must be less than 200 seconds.")
-                return
-
+            # Files longer than one ASR request are transcribed in chunks by the pipeline
             self.upload_button.config(state="disabled")
             self.progress.pack()
             self.progress.start()
             threading.Thread(target=self.process_file).start()
 
+    def start_warm_up(self):
+        # Heavy modules load in the background after the window is shown, instead of delaying it
+        threading.Thread(target=self.warm_up, daemon=True).start()
+
+    @staticmethod
+    def warm_up():
+        try:
+            SpeechToTextPipeline.warm_up()
+        except Exception:
+            # The first file reports the error
+            pass
+
     def process_file(self):
         try:
             load_dotenv()
@@ -85,32 +78,11 @@ class SpeechToTextApp:
             if not token:
                 raise ValueError("NLPCLOUD_TOKEN is not set in the environment.")
 
-            # Speech-to-text process
-            client = nlpcloud.Client("whisper", token, True)
-            with open(self.wav_file, 'rb') as binary_file:
-                binary_file_data = binary_file.read()
-                base64_encoded_data = base64.b64encode(binary_file_data)
-                base64_output = base64_encoded_data.decode('utf-8')
-
-                asr_result = client.asr(encoded_file=base64_output, input_language='ar')
-                self.transcribed_text = asr_result["text"]
-
-            llama_client = nlpcloud.Client("finetuned-llama-3-70b", token, gpu=True)
-
-            # Grammar correction client
-            grammar_correction_result = llama_client.gs_correction(text=self.transcribed_text)
-            self.transcribed_text = grammar_correction_result['correction']
-
-            # Summarization process
-            summary_result = llama_client.summarization(text=self.transcribed_text)
-            self.summary = summary_result["summary_text"]
-
-            # Morphological analysis
-            analyzed_text = morph_analyzer.analyze(text=self.transcribed_text, task='lemmatization')
-            self.lemmas = [arStrip(text=text['lemma']) for text in analyzed_text]
-
-            # Detect specific words
-            self.detected_words = [lemma for lemma in self.lemmas if lemma in self.get_detection_dict()]
+            result_data = SpeechToTextPipeline.process_file(self.wav_file)
+            self.transcribed_text = result_data["full_text"]
+            self.summary = result_data["summary"]
+            self.lemmas = result_data["lemmas"]
+            self.detected_words = result_data["detected_words"]
 
             # Save results to JSON
             self.save_results()
@@ -131,17 +103,12 @@ class SpeechToTextApp:
             "lemmas": self.lemmas,
             "detected_words": self.detected_words,
         }
-        os.makedirs(os.path.dirname(self.result_path), exist_ok=True)
-        with open(self.result_path, "w", encoding="utf-8") as result_file:
-            json.dump(result_data, result_file, ensure_ascii=False, indent=4)
-
-    @staticmethod
-    def get_detection_dict():
-        return {}
+        save_result_to_local_file(self.result_path, result_data)
 
 
 # Main App Execution
 if __name__ == "__main__":
     root = tk.Tk()
     app = SpeechToTextApp(root)
+    root.after(100, app.start_warm_up)
     root.mainloop()
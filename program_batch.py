@@ -0,0 +1,144 @@
+import argparse
+import glob
+import os
+import sys
+
+from dotenv import load_dotenv
+from utils.nlp_cloud_api import LLAMA_MODEL, WHISPER_MODEL, NLPCloudApi
+from utils.lemma_cache import get_lemma_cache
+from utils.pipeline import SpeechToTextPipeline
+from utils.result_cache import get_result_cache
+from utils.sina_tools_api import SinaToolsApi, get_default_processes
+from utils.utils import save_result_to_local_file
+
+AUDIO_EXTENSIONS = (".wav", ".mp3")
+
+
+def collect_audio_files(inputs):
+    # Every input is either a directory (walked recursively) or a glob pattern
+    audio_files = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for directory, _, file_names in os.walk(pattern):
+                for file_name in file_names:
+                    if file_name.lower().endswith(AUDIO_EXTENSIONS):
+                        audio_files.add(os.path.abspath(os.path.join(directory, file_name)))
+        else:
+            for file_path in glob.glob(pattern, recursive=True):
+                if os.path.isfile(file_path) and file_path.lower().endswith(AUDIO_EXTENSIONS):
+                    audio_files.add(os.path.abspath(file_path))
+
+    return sorted(audio_files)
+
+
+def get_result_path(file_path, base_directory, output_directory):
+    # Mirror the input tree so files with the same name in different folders never collide
+    relative_path = os.path.relpath(file_path, base_directory)
+    return os.path.join(output_directory, relative_path + ".json")
+
+
+def get_asr_options(args):
+    asr_options = {"workers": args.chunk_workers}
+    if args.asr_backend == "whisper":
+        asr_options["model_name"] = args.whisper_model
+        asr_options["batch_size"] = args.whisper_batch_size
+        asr_options["threads"] = args.whisper_threads
+    return asr_options
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run the speech-to-text pipeline over many audio files.")
+    parser.add_argument("inputs", nargs="+", help="Directories or glob patterns of .wav/.mp3 files")
+    parser.add_argument("-o", "--output-dir", default="results", help="Directory to write one JSON result per input")
+    parser.add_argument("--asr-workers", type=int, default=4, help="Concurrent speech-to-text requests")
+    parser.add_argument("--asr-backend", choices=["nlpcloud", "whisper", "transkriptor", "google"], default="nlpcloud",
+                        help="Speech-to-text engine")
+    parser.add_argument("--whisper-model", default="turbo", help="Model of the local whisper backend")
+    parser.add_argument("--whisper-batch-size", type=int, default=1,
+                        help="Segments of up to 30 s decoded together by the local whisper backend")
+    parser.add_argument("--whisper-threads", type=int, default=None, help="torch CPU threads per whisper worker")
+    parser.add_argument("--chunk-workers", type=int, default=4,
+                        help="Concurrent chunk requests of the ASR backend, "
+                             "for local whisper its worker processes (at most WHISPER_MAX_WORKERS, 2 by default)")
+    parser.add_argument("--vad", action="store_true",
+                        help="Only send voiced audio to ASR, cutting chunks at pauses and dropping silence")
+    parser.add_argument("--audio-format", choices=["wav", "flac", "opus", "original"], default="flac",
+                        help="Format of the 16 kHz mono copy sent to ASR (the original is sent when it is smaller), "
+                             "or 'original' to always send files as they are")
+    parser.add_argument("--correction-workers", type=int, default=2, help="Concurrent grammar correction requests")
+    parser.add_argument("--summary-workers", type=int, default=2, help="Concurrent summarization requests")
+    parser.add_argument("--morphology-workers", type=int, default=1, help="Concurrent lemmatization jobs")
+    parser.add_argument("--morphology-processes", type=int, default=get_default_processes(),
+                        help="SinaTools worker processes (at most one per core), long transcripts are split by "
+                             "sentence across them")
+    parser.add_argument("--queue-size", type=int, default=4, help="Files buffered between two stages")
+    parser.add_argument("--max-duration", type=float, default=0,
+                        help="Skip files longer than this many seconds (0 disables the check)")
+    parser.add_argument("--skip-existing", action="store_true", help="Do not reprocess files that have a result")
+    return parser.parse_args()
+
+
+def main():
+    load_dotenv()
+    args = parse_arguments()
+
+    if not os.getenv("NLPCLOUD_TOKEN"):
+        print("NLPCLOUD_TOKEN is not set in the environment.", file=sys.stderr)
+        return 1
+
+    audio_files = collect_audio_files(args.inputs)
+    if not audio_files:
+        print("No audio files found.", file=sys.stderr)
+        return 1
+
+    base_directory = os.path.commonpath([os.path.dirname(file_path) for file_path in audio_files])
+    jobs = {file_path: get_result_path(file_path, base_directory, args.output_dir) for file_path in audio_files}
+    if args.skip_existing:
+        jobs = {file_path: result_path for file_path, result_path in jobs.items() if not os.path.exists(result_path)}
+
+    # One NLP Cloud connection per concurrent request of each model
+    NLPCloudApi.configure({
+        LLAMA_MODEL: args.correction_workers + args.summary_workers,
+        WHISPER_MODEL: args.chunk_workers,
+    })
+    SinaToolsApi.configure(args.morphology_processes)
+
+    failed_files = []
+    results = SpeechToTextPipeline.process_files(
+        list(jobs),
+        queue_size=args.queue_size,
+        asr_workers=args.asr_workers,
+        asr_backend=args.asr_backend,
+        asr_options=get_asr_options(args),
+        use_vad=args.vad,
+        audio_format=None if args.audio_format == "original" else args.audio_format,
+        correction_workers=args.correction_workers,
+        summary_workers=args.summary_workers,
+        morphology_workers=args.morphology_workers,
+        max_duration=args.max_duration,
+    )
+    for index, (file_path, result_data, error) in enumerate(results, start=1):
+        if error is not None:
+            failed_files.append(file_path)
+            print(f"[{index}/{len(jobs)}] {file_path} failed: {error}", file=sys.stderr)
+            continue
+
+        save_result_to_local_file(jobs[file_path], result_data)
+        print(f"[{index}/{len(jobs)}] {file_path} -> {jobs[file_path]}")
+
+    print(f"Processed {len(jobs) - len(failed_files)} files, {len(failed_files)} failed.")
+    result_cache = get_result_cache()
+    if result_cache is not None:
+        cache_stats = result_cache.get_stats()
+        print(f"Result cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['entries']} entries ({cache_stats['size_bytes']} bytes)")
+    lemma_cache = get_lemma_cache()
+    if lemma_cache is not None:
+        lemma_stats = lemma_cache.get_stats()
+        print(f"Lemma cache: {lemma_stats['hit_rate']:.1%} hit rate ({lemma_stats['hits']} hits, "
+              f"{lemma_stats['misses']} misses), {lemma_stats['entries']} entries")
+    return 1 if failed_files else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,12 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
-import json
 import os
-import base64
 
-import requests
 from dotenv import load_dotenv
-import nlpcloud
-from pydub import AudioSegment
-from sinatools.morphology import morph_analyzer
-from sinatools.utils.parser import arStrip
+from utils.pipeline import SpeechToTextPipeline
+from utils.transkriptor_api import TranskriptorApi
+from utils.utils import get_audio_duration, save_result_to_local_file
 
 
 class SpeechToTextApp:
@@ -58,8 +54,7 @@ class SpeechToTextApp:
 
     def get_audio_duration(self, file_path):
         try:
-            audio = AudioSegment.from_file(file_path)
-            duration_seconds = audio.duration_seconds
+            duration_seconds = get_audio_duration(file_path)
 
             return duration_seconds
         except Exception as e:
@@ -80,97 +75,25 @@ class SpeechToTextApp:
             self.progress.start()
             threading.Thread(target=self.process_file).start()
 
-    def transcribe(self):
-        # Step 1: Obtain the Upload URL
-        url = "https://api.tor.app/developer/transcription/local_file/get_upload_url"
-
-        # Replace with your actual API key
-        api_key = os.getenv("TRANSKRIPTOR_TOKEN")
-
-        # Set up the headers, including the API key
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "application/json",
-        }
-
-        # Request body with the file name
-        body = json.dumps({"file_name": "Sound file"})
-
-        # Request to get the upload URL
-        response = requests.post(url, headers=headers, data=body)
-        if response.status_code == 200:
-            response_json = response.json()
-            upload_url = response_json["upload_url"]
-            public_url = response_json["public_url"]
-        else:
-            raise Exception("Unable to get response of transkriptor url: ", response.status_code, response.text)
-
-        # Step 2: Upload the Local File
-        file_path = self.wav_file
-        with open(file_path, "rb") as file_data:
-            upload_response = requests.put(upload_url, data=file_data)
-            if upload_response.status_code != 200:
-                raise Exception("Unable to upload sound file")
-
-        # Step 3: Initiate Transcription for the Uploaded File
-        initiate_url = (
-            "https://api.tor.app/developer/transcription/local_file/initiate_transcription"
-        )
-
-        # Configure transcription parameters
-        config = json.dumps(
-            {
-                "url": public_url,  # Passing public_url to initiate transcription
-                "language": "en-US",
-                "service": "Standard",
-                # "folder_id": "your_folder_id",  # Optional folder_id
-                # "triggering_word": "example",  # Optional triggering_word
-            }
-        )
-
-        # Send request to initiate transcription
-        transcription_response = requests.post(initiate_url, headers=headers, data=config)
-        if transcription_response.status_code == 202:
-            transcription_json = transcription_response.json()
-            print(transcription_json)
-        else:
-            raise Exception("Failed to transcribe")
-
     def process_file(self):
         try:
             load_dotenv()
-            self.transcribe()
             token = os.getenv("NLPCLOUD_TOKEN")
             if not token:
                 raise ValueError("NLPCLOUD_TOKEN is not set in the environment.")
 
-            # Speech-to-text process
-            client = nlpcloud.Client("whisper", token, True)
-            with open(self.wav_file, 'rb') as binary_file:
-                binary_file_data = binary_file.read()
-                base64_encoded_data = base64.b64encode(binary_file_data)
-                base64_output = base64_encoded_data.decode('utf-8')
-
-                asr_result = client.asr(encoded_file=base64_output, input_language='ar')
-                self.transcribed_text = asr_result["text"]
+            # Starts a Transkriptor order for the file; its upload is resumed and its requests are
+            # rate limited by TranskriptorApi
+            order_id = TranskriptorApi.transcribe_local_file(self.wav_file)
+            print(f"Transkriptor order {order_id}")
 
-            llama_client = nlpcloud.Client("finetuned-llama-3-70b", token, gpu=True)
-
-            # Grammar correction client
-            grammar_correction_result = llama_client.gs_correction(text=self.transcribed_text)
-            self.transcribed_text = grammar_correction_result['correction']
-
-            # Summarization process
-            summary_result = llama_client.summarization(text=self.transcribed_text)
-            self.summary = summary_result["summary_text"]
-
-            # Morphological analysis
-            analyzed_text = morph_analyzer.analyze(text=self.transcribed_text, task='lemmatization')
-            self.lemmas = [arStrip(text=text['lemma']) for text in analyzed_text]
-
-            # Detect specific words
-            self.detected_words = [lemma for lemma in self.lemmas if lemma in self.get_detection_dict()]
+            # Speech-to-text, grammar correction, summary, lemmatization and word detection through the
+            # shared pipeline, with its streamed requests and cached results
+            result_data = SpeechToTextPipeline.process_file(self.wav_file)
+            self.transcribed_text = result_data["full_text"]
+            self.summary = result_data["summary"]
+            self.lemmas = result_data["lemmas"]
+            self.detected_words = result_data["detected_words"]
 
             # Save results to JSON
             self.save_results()
@@ -191,13 +114,7 @@ class SpeechToTextApp:
             "lemmas": self.lemmas,
             "detected_words": self.detected_words,
         }
-        os.makedirs(os.path.dirname(self.result_path), exist_ok=True)
-        with open(self.result_path, "w", encoding="utf-8") as result_file:
-            json.dump(result_data, result_file, ensure_ascii=False, indent=4)
-
-    @staticmethod
-    def get_detection_dict():
-        return {}
+        save_result_to_local_file(self.result_path, result_data)
 
 
 # Main App Execution
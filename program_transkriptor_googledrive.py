@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
+import asyncio
+import sys
 from dotenv import load_dotenv
 from utils.google_drive_api import GoogleDriveApi
+from utils.order_tracker import OrderTracker
 from utils.transkriptor_api import TranskriptorApi
 from utils.utils import get_audio_duration, save_result_to_local_file
 
@@ -70,16 +73,17 @@ class SpeechToTextApp:
 
     def process_file(self):
         try:
-            # google_drive_url = GoogleDriveApi.upload_audio_file_to_google_drive(self.wav_file)
-            # order_id = TranskriptorApi.transcribe_using_google_drive_url(google_drive_url)
-            #
-            # # Save results to JSON
-            # self.save_results()
-            #
-            # # Success message
-            # self.status_label.config(text=f"Processing complete! Results saved at {self.result_path}
-
-            TranskriptorApi.get_order_status('123')
+            google_drive_url = GoogleDriveApi.upload_audio_file_to_google_drive(self.wav_file)
+            order_id = TranskriptorApi.transcribe_using_google_drive_url(google_drive_url)
+
+            # Orders left pending by an earlier run are tracked again and saved to their own result files
+            order_tracker = OrderTracker()
+            order_tracker.add_order(order_id, {"file_path": self.wav_file})
+            self.status_label.config(text="Waiting for the transcription...")
+            asyncio.run(self.track_orders(order_tracker, str(order_id)))
+
+            # Success message
+            self.status_label.config(text=f"Processing complete! Results saved at {self.result_path}")
         except Exception as e:
             self.status_label.config(text=f"An error occurred: {str(e)}")
         finally:
@@ -87,6 +91,23 @@ class SpeechToTextApp:
             self.progress.pack_forget()
             self.retry_button.pack()
 
+    async def track_orders(self, order_tracker, order_id):
+        # Stops at this file's order, the earlier orders still pending stay saved for the next run
+        async for tracked_order in order_tracker.completed():
+            if tracked_order.order_id != order_id:
+                if tracked_order.error is not None:
+                    print(f"Order {tracked_order.order_id} failed: {tracked_order.error}", file=sys.stderr)
+                else:
+                    save_result_to_local_file(f"results/{tracked_order.order_id}.json",
+                                              {"full_text": tracked_order.transcript})
+                continue
+
+            if tracked_order.error is not None:
+                raise tracked_order.error
+            self.transcribed_text = tracked_order.transcript
+            self.save_results()
+            break
+
     def save_results(self):
         result_data = {
             "full_text": self.transcribed_text,
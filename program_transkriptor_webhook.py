@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from utils.order_tracker import OrderTracker
+from utils.pipeline import SpeechToTextPipeline
+from utils.transkriptor_api import TranskriptorApi
+from utils.utils import save_result_to_local_file
+from utils.webhook_server import TranskriptorWebhookServer
+
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def process_transcript(tracked_order, output_directory):
+    # Grammar correction, summary and lemmatization of a finished Transkriptor order
+    result_path = os.path.join(output_directory, f"{tracked_order.order_id}.json")
+    try:
+        result_data = SpeechToTextPipeline.process_text(tracked_order.transcript)
+        save_result_to_local_file(result_path, result_data)
+        print(f"{tracked_order.order_id} -> {result_path}")
+    except Exception as e:
+        print(f"{tracked_order.order_id} failed: {e}", file=sys.stderr)
+
+
+async def track_orders(args):
+    # Orders still pending from earlier runs are loaded from the tracker state, polling is only a fallback
+    order_tracker = OrderTracker(initial_delay=args.poll_delay)
+    for order_id in args.order_ids:
+        order_tracker.add_order(order_id)
+    if not order_tracker.pending:
+        print("No pending orders to track.", file=sys.stderr)
+        return 1
+
+    webhook_server = TranskriptorWebhookServer(order_tracker, args.host, args.port, secret=args.secret)
+    await webhook_server.start()
+    if args.public_url:
+        webhook_url = f"{args.public_url}?token={args.secret}" if args.secret else args.public_url
+        await asyncio.to_thread(TranskriptorApi.register_webhook, webhook_url, export_format="Txt")
+
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    processing = []
+    try:
+        async for tracked_order in order_tracker.completed():
+            if tracked_order.error is not None:
+                print(f"{tracked_order.order_id} failed: {tracked_order.error}", file=sys.stderr)
+                continue
+            processing.append(loop.run_in_executor(executor, process_transcript, tracked_order, args.output_dir))
+        await asyncio.gather(*processing)
+    finally:
+        await webhook_server.close()
+        executor.shutdown()
+    return 0
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Receive Transkriptor webhooks and process finished orders.")
+    parser.add_argument("order_ids", nargs="*", help="Orders to track in addition to the pending ones")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on, anything but localhost needs --secret")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--public-url", help="Public URL of this server to register as the Transkriptor webhook")
+    parser.add_argument("--secret", help="Token the webhook URL must carry as ?token=")
+    parser.add_argument("--poll-delay", type=float, default=300,
+                        help="Seconds before an order without a webhook is polled")
+    parser.add_argument("-o", "--output-dir", default="results", help="Directory to write one JSON result per order")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Transcripts processed in parallel")
+    args = parser.parse_args()
+    if args.host not in LOCAL_HOSTS and not args.secret:
+        parser.error("--secret is required when listening on a public address")
+    return args
+
+
+def main():
+    load_dotenv()
+    return asyncio.run(track_orders(parse_arguments()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
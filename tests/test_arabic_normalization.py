@@ -0,0 +1,16 @@
+from utils.arabic_normalization import fold_text, fold_tokens, normalize_text
+
+
+def test_normalize_text_keeps_what_the_analyzer_relies_on():
+    assert normalize_text("  الْكِتَـــابُ‌  رقم ٢٠٢٤؟\nشُكْرًا ") == "الْكِتَابُ رقم 2024?\nشُكْرًا"
+    assert normalize_text("إلى مكتبة") == "إلى مكتبة"
+
+
+def test_folding_maps_spelling_variants_to_one_key():
+    assert fold_text("إِلْغَاءُ   الاشْتِرَاكِ") == fold_text("الغاء الاشتراك") == "الغاء الاشتراك"
+    assert fold_text("مستشفى الفاتورة") == "مستشفي الفاتوره"
+
+
+def test_fold_tokens_keeps_token_positions():
+    assert fold_tokens(["أَ", "", "ـ", "ة"]) == ["ا", "", "", "ه"]
+    assert fold_tokens([]) == []
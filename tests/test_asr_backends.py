@@ -0,0 +1,44 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.asr_backends import WhisperLocalAsrBackend
+
+
+def test_whisper_workers_are_bounded_and_share_the_cores(monkeypatch, capsys):
+    monkeypatch.delenv("WHISPER_MAX_WORKERS", raising=False)
+    backend = WhisperLocalAsrBackend(workers=64)
+    assert backend.workers == min(2, os.cpu_count() or 1)
+    assert "instead of 64" in capsys.readouterr().err
+    if backend.workers > 1:
+        assert backend.threads * backend.workers <= os.cpu_count()
+    assert WhisperLocalAsrBackend(workers=1, threads=3).threads == 3
+    assert capsys.readouterr().err == ""
+
+
+def test_whisper_worker_limit_is_configurable(monkeypatch):
+    monkeypatch.setenv("WHISPER_MAX_WORKERS", "64")
+    assert WhisperLocalAsrBackend(workers=64).workers == (os.cpu_count() or 1)
+
+
+def test_in_process_whisper_decodes_one_segment_at_a_time():
+    backend = WhisperLocalAsrBackend(workers=1)
+    # The model is taken as loaded, only the decodes are run
+    backend.initialized = True
+    running, overlaps = [], []
+    lock = threading.Lock()
+
+    def decode(segment):
+        with lock:
+            running.append(segment)
+            overlaps.append(len(running) > 1)
+        time.sleep(0.01)
+        with lock:
+            running.remove(segment)
+        return segment.upper()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = list(executor.map(lambda segment: backend.run(decode, segment), ["a", "b", "c", "d"]))
+    assert [future.result() for future in futures] == ["A", "B", "C", "D"]
+    assert not any(overlaps)
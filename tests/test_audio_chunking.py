@@ -0,0 +1,53 @@
+from utils.audio_chunking import get_chunk_windows, stitch_transcripts
+
+
+def test_chunk_windows_overlap_and_cover_the_audio():
+    assert get_chunk_windows(250, window_ms=100, overlap_ms=10) == [(0, 100), (90, 190), (180, 250)]
+    assert get_chunk_windows(80, window_ms=100, overlap_ms=10) == [(0, 80)]
+
+
+def test_stitch_keeps_the_overlap_once():
+    first = "we talked about the weather today and then we talked about the city of cairo"
+    second = "and then we talked about the city of cairo before we went home"
+    assert stitch_transcripts([first, second], overlap_ms=5000) == (
+        "we talked about the weather today and then we talked about the city of cairo before we went home"
+    )
+
+
+def test_stitch_drops_words_cut_at_the_chunk_edges():
+    first = "one two three four five six seven eight nine ten elev"
+    second = "ive six seven eight nine ten eleven twelve"
+    assert stitch_transcripts([first, second], overlap_ms=2000) == (
+        "one two three four five six seven eight nine ten eleven twelve"
+    )
+
+
+def test_stitch_ignores_punctuation_at_the_seam():
+    first = "the meeting starts at nine in the morning, said the manager."
+    second = "in the morning said the manager. everyone agreed"
+    assert stitch_transcripts([first, second], overlap_ms=2000) == (
+        "the meeting starts at nine in the morning, said the manager. everyone agreed"
+    )
+
+
+def test_stitch_does_not_cut_at_a_phrase_in_the_middle_of_the_head():
+    first = "we talked about the weather in the city of cairo"
+    second = "and then in the city of alexandria it rained"
+    assert stitch_transcripts([first, second], overlap_ms=5000) == f"{first} {second}"
+
+
+def test_stitch_does_not_cut_at_a_phrase_repeated_inside_the_tail():
+    first = "in the city of cairo we met the minister of health of egypt"
+    second = "in the city of cairo the weather was hot"
+    assert stitch_transcripts([first, second], overlap_ms=2000) == f"{first} {second}"
+
+
+def test_stitch_needs_a_run_as_long_as_the_overlap():
+    first = "the report was about the city of cairo"
+    second = "the city of cairo is the capital"
+    # Four shared words are too few for a 10 s overlap, which holds about twenty words
+    assert stitch_transcripts([first, second], overlap_ms=10000) == f"{first} {second}"
+
+
+def test_stitch_joins_texts_without_overlap():
+    assert stitch_transcripts(["first chunk", "", "second chunk"]) == "first chunk second chunk"
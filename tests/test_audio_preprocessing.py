@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+from pydub import AudioSegment
+
+from utils.audio_chunking import export_audio_chunk
+from utils.audio_preprocessing import prepared_audio_file
+
+
+def write_tone(path, frame_rate, channels, seconds=1):
+    time = np.arange(frame_rate * seconds) / frame_rate
+    samples = np.repeat((0.3 * np.sin(2 * np.pi * 220 * time) * 32767).astype(np.int16), channels)
+    AudioSegment(samples.tobytes(), frame_rate=frame_rate, sample_width=2, channels=channels).export(path, format="wav")
+
+
+def test_prepared_copy_is_16_khz_mono(tmp_path):
+    file_path = str(tmp_path / "stereo.wav")
+    write_tone(file_path, 44100, 2)
+    with prepared_audio_file(file_path, "wav") as prepared_file_path:
+        assert prepared_file_path != file_path
+        prepared_audio = AudioSegment.from_file(prepared_file_path)
+        assert (prepared_audio.frame_rate, prepared_audio.channels) == (16000, 1)
+    assert not os.path.exists(prepared_file_path)
+
+
+def test_original_is_kept_when_it_is_not_larger(tmp_path):
+    file_path = str(tmp_path / "mono.wav")
+    write_tone(file_path, 8000, 1)
+    with prepared_audio_file(file_path, "wav") as prepared_file_path:
+        assert prepared_file_path == file_path
+    assert os.path.exists(file_path)
+
+
+def test_audio_chunks_are_exported_in_the_given_format(tmp_path):
+    audio = AudioSegment.silent(duration=1000, frame_rate=16000)
+    chunk_path = export_audio_chunk(audio, [(0, 200), (500, 800)], "wav")
+    try:
+        assert chunk_path.endswith(".wav")
+        assert len(AudioSegment.from_file(chunk_path)) == 500
+    finally:
+        os.remove(chunk_path)
@@ -0,0 +1,23 @@
+import struct
+import wave
+
+from utils.audio_probe import probe_audio
+
+
+def test_wav_headers(tmp_path):
+    file_path = str(tmp_path / "tone.wav")
+    with wave.open(file_path, "wb") as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(b"\x00\x00" * 2 * 44100 * 3)
+    assert probe_audio(file_path) == (3000, 44100, 2)
+
+
+def test_flac_stream_info(tmp_path):
+    # STREAMINFO of 16 kHz mono 16-bit audio with 40000 samples, followed by no audio frames
+    stream_info = (16000 << 44) | (0 << 41) | (15 << 36) | 40000
+    header = b"fLaC" + bytes([0x80]) + (34).to_bytes(3, "big") + struct.pack(">HH", 4096, 4096) + bytes(6)
+    file_path = tmp_path / "speech.flac"
+    file_path.write_bytes(header + stream_info.to_bytes(8, "big") + bytes(16))
+    assert probe_audio(str(file_path)) == (2500, 16000, 1)
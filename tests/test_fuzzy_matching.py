@@ -0,0 +1,57 @@
+import pickle
+
+from utils.fuzzy_matching import SymSpellIndex, get_edit_distance
+
+
+def test_edit_distance_counts_transpositions_and_stops_past_the_maximum():
+    assert get_edit_distance("فاتوره", "فاتوره", 2) == 0
+    assert get_edit_distance("فاتوره", "فتاوره", 2) == 1
+    assert get_edit_distance("فاتوره", "فاتور", 2) == 1
+    assert get_edit_distance("abcdef", "uvwxyz", 2) == 3
+    assert get_edit_distance("abc", "abcdefg", 2) == 3
+
+
+def test_lookup_finds_the_closest_vocabulary_word():
+    index = SymSpellIndex(["فاتوره", "اشتراك", "رصيد"], max_distance=2)
+    assert index.lookup("فاتوره") == ("فاتوره", 0)
+    assert index.lookup("فاتورة") == ("فاتوره", 1)
+    assert index.lookup("اشتراكك") == ("اشتراك", 1)
+    assert index.lookup("فتوره") == ("فاتوره", 1)
+    assert index.lookup("مكالمه") == (None, None)
+
+
+def test_short_tokens_only_match_exactly():
+    index = SymSpellIndex(["رصيد", "خط"], max_distance=1)
+    assert index.lookup("خط") == ("خط", 0)
+    assert index.lookup("خطا") == (None, None)
+    assert index.lookup("رصيد") == ("رصيد", 0)
+
+
+def test_ties_go_to_the_alphabetically_first_word():
+    index = SymSpellIndex(["abcx", "abcy"], max_distance=1)
+    assert index.lookup("abcz") == ("abcx", 1)
+
+
+def test_canonical_tokens_keep_unmatched_tokens():
+    index = SymSpellIndex(["فاتوره", "اشتراك"], max_distance=1)
+    assert index.get_canonical_tokens(["الغاء", "اشتراكك", "فاتوره"]) == ["الغاء", "اشتراك", "فاتوره"]
+
+
+def test_pickled_index_gets_a_fresh_lookup_cache():
+    index = SymSpellIndex(["فاتوره"], max_distance=1)
+    index.lookup("فاتورا")
+    restored_index = pickle.loads(pickle.dumps(index))
+    assert restored_index.lookup_cache == {}
+    assert restored_index.lookup("فاتورا") == ("فاتوره", 1)
+
+
+def test_detection_reports_misspelled_lemmas_as_variants(monkeypatch):
+    from utils import keyword_detection
+
+    automaton = keyword_detection.KeywordAutomaton(["إلغاء الاشتراك", "فاتورة"])
+    monkeypatch.setattr(keyword_detection, "_keyword_automaton", automaton)
+    monkeypatch.setattr(keyword_detection, "_fuzzy_index", SymSpellIndex(automaton.get_vocabulary(), 1))
+    assert keyword_detection.detect_keywords(["الغاء", "الاشتراكك", "فاتورة", "الغاء", "الاشتراك"]) == {
+        "إلغاء الاشتراك": {"count": 2, "positions": [[0, 2], [3, 5]], "variants": ["الغاء الاشتراكك"]},
+        "فاتورة": {"count": 1, "positions": [[2, 3]]},
+    }
@@ -0,0 +1,50 @@
+from utils import grammar_correction
+from utils.nlp_cloud_api import NLPCloudApi
+from utils.result_cache import ResultCache
+from utils.text_segmentation import split_sentences
+
+
+def correct_with(monkeypatch, tmp_path, correct):
+    # Corrections go through `correct` and a result cache of its own; returns the requests and the cache
+    requests = []
+    result_cache = ResultCache(str(tmp_path / "results.sqlite"))
+
+    def correct_grammar_from_text(text):
+        requests.append(text)
+        return correct(text)
+
+    monkeypatch.setattr(NLPCloudApi, "correct_grammar_from_text", correct_grammar_from_text)
+    monkeypatch.setattr(grammar_correction, "get_result_cache", lambda: result_cache)
+    return requests, result_cache
+
+
+def test_batches_pack_consecutive_sentences_within_the_budget():
+    sentences = ["a b", "c d", "e f g h", "i", "j"]
+    assert grammar_correction.get_correction_batches([0, 1, 2, 3, 4], sentences, 8) == [[0, 1], [2], [3, 4]]
+    # A skipped (cached or letterless) sentence ends a batch
+    assert grammar_correction.get_correction_batches([0, 2, 3], sentences, 100) == [[0], [2, 3]]
+    assert grammar_correction.get_correction_batches([], sentences, 8) == []
+
+
+def test_corrected_text_keeps_the_original_newlines_and_spacing(monkeypatch, tmp_path):
+    requests, _ = correct_with(monkeypatch, tmp_path, lambda text: text.replace("teh", "the"))
+    text = "teh first line.\nteh second line.  123.\n\nlast teh line"
+    assert grammar_correction.correct_long_text(text) == "the first line.\nthe second line.  123.\n\nlast the line"
+    assert requests == ["teh first line.\nteh second line.", "last teh line"]
+
+    # Every aligned sentence is cached on its own, the same sentences elsewhere need no request
+    requests.clear()
+    assert grammar_correction.correct_long_text("teh second line. teh first line.") == (
+        "the second line. the first line."
+    )
+    assert requests == []
+
+
+def test_misaligned_corrections_stay_one_piece_and_are_not_cached_per_sentence(monkeypatch, tmp_path):
+    # The correction swaps the two sentences: same count, but each one no longer matches its source
+    requests, result_cache = correct_with(monkeypatch, tmp_path, lambda text: " ".join(reversed(split_sentences(text))))
+    text = "first sentence is short. second one too.\n123"
+    assert grammar_correction.correct_long_text(text) == "second one too. first sentence is short.\n123"
+    assert requests == ["first sentence is short. second one too."]
+    found, _ = result_cache.get(grammar_correction.get_sentence_cache_key("first sentence is short."))
+    assert not found
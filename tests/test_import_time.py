@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Only loaded by the stages that need them, never by importing the pipeline
+HEAVY_MODULES = ("nlpcloud", "pydub", "sinatools", "whisper", "torch", "googleapiclient", "numpy")
+
+
+def get_imported_modules(statement):
+    # Top-level modules imported by the statement in a fresh interpreter, from python -X importtime
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=REPO_DIRECTORY,
+                            capture_output=True, text=True, check=True)
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.count("|") == 2:
+            modules.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return modules
+
+
+@pytest.mark.parametrize("statement", ["import utils.pipeline", "import program_batch"])
+def test_heavy_modules_are_not_imported_at_startup(statement):
+    assert get_imported_modules(statement).isdisjoint(HEAVY_MODULES)
@@ -0,0 +1,51 @@
+import os
+
+from utils.arabic_normalization import fold_tokens
+from utils.keyword_detection import KeywordAutomaton, load_keyword_automaton, read_lexicon
+
+
+def test_overlapping_terms_and_phrases_are_all_found():
+    automaton = KeywordAutomaton(["a b c", "b c d", "c", "b"])
+    assert sorted(automaton.find_matches("x a b c d c".split())) == [
+        ("a b c", 1, 4),
+        ("b", 2, 3),
+        ("b c d", 2, 5),
+        ("c", 3, 4),
+        ("c", 5, 6),
+    ]
+
+
+def test_failure_links_resume_inside_a_broken_phrase():
+    # "a b" fails at the second "a", which still starts the "a b c" found right after
+    automaton = KeywordAutomaton(["a b x", "a b c"])
+    assert list(automaton.find_matches("a b a b c".split())) == [("a b c", 2, 5)]
+
+
+def test_detect_counts_terms_and_reports_them_as_written():
+    automaton = KeywordAutomaton(["فاتورة", "إلغاء الاشتراك"])
+    lemmas = fold_tokens(["أريد", "الغاء", "الاشتراك", "و", "الفاتوره", "فاتوره", "الغاء", "الاشتراك"])
+    assert automaton.detect(lemmas) == {
+        "إلغاء الاشتراك": {"count": 2, "positions": [[1, 3], [6, 8]]},
+        "فاتورة": {"count": 1, "positions": [[5, 6]]},
+    }
+
+
+def test_duplicate_and_empty_terms_are_ignored():
+    automaton = KeywordAutomaton(["a b", "a  b", "", "  "])
+    assert automaton.terms == ["a b"]
+    assert automaton.detect("a b".split()) == {"a b": {"count": 1, "positions": [[0, 2]]}}
+    assert KeywordAutomaton([]).detect("a b".split()) == {}
+
+
+def test_compiled_automaton_is_cached_until_the_lexicon_changes(tmp_path):
+    lexicon_path = tmp_path / "lexicon.txt"
+    lexicon_path.write_text("# terms\nفاتورة\n\nإلغاء الاشتراك\n", encoding="utf-8")
+    assert read_lexicon(lexicon_path) == ["فاتورة", "إلغاء الاشتراك"]
+
+    automaton = load_keyword_automaton(lexicon_path, tmp_path / "cache")
+    assert len(os.listdir(tmp_path / "cache")) == 1
+    assert load_keyword_automaton(lexicon_path, tmp_path / "cache").terms == automaton.terms
+
+    lexicon_path.write_text("رصيد\n", encoding="utf-8")
+    assert load_keyword_automaton(lexicon_path, tmp_path / "cache").terms == ["رصيد"]
+    assert len(os.listdir(tmp_path / "cache")) == 2
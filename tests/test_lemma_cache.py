@@ -0,0 +1,48 @@
+import pytest
+
+from utils import lemma_cache
+from utils.lemma_cache import LemmaCache
+
+
+def test_lookups_count_hits_and_misses():
+    cache = LemmaCache()
+    cache.set_many({"كتب": "كتب", "الكتاب": "كتاب"})
+    assert cache.get_many(["الكتاب", "قلم", "كتب", "الكتاب"]) == {"الكتاب": "كتاب", "كتب": "كتب"}
+    assert cache.get_stats() == {"hits": 3, "misses": 1, "entries": 2, "hit_rate": 0.75}
+
+
+def test_least_recently_used_tokens_are_dropped():
+    cache = LemmaCache(max_entries=2)
+    cache.set_many({"a": "1", "b": "2"})
+    cache.get_many(["a"])
+    cache.set_many({"c": "3"})
+    assert cache.get_many(["a", "b", "c"]) == {"a": "1", "c": "3"}
+
+
+def test_persistent_cache_is_reloaded(tmp_path):
+    path = str(tmp_path / "lemmas.json")
+    cache = LemmaCache(path=path)
+    cache.set_many({"الكتاب": "كتاب"})
+    cache.save()
+    assert LemmaCache(path=path).get_many(["الكتاب"]) == {"الكتاب": "كتاب"}
+
+
+def test_cached_lemmas_match_the_uncached_analysis(monkeypatch):
+    pytest.importorskip("sinatools")
+    from sinatools.morphology import morph_analyzer
+    from sinatools.utils.parser import arStrip
+
+    from utils.sina_tools_api import SinaToolsApi
+
+    text = "ذهب الولد إلى المدرسة. ذهب الولد إلى المكتبة، والمدرسة قريبة من المكتبة."
+    analyzed_text = morph_analyzer.analyze(text=text, task="lemmatization")
+    expected_lemmas = [arStrip(text=token["lemma"]) for token in analyzed_text]
+
+    cache = LemmaCache()
+    monkeypatch.setattr(lemma_cache, "_lemma_cache", cache)
+    monkeypatch.delenv("LEMMA_CACHE_DISABLED", raising=False)
+    # First all misses, then every token is a hit, with the same lemmas both times
+    assert SinaToolsApi.get_lemmas(text) == expected_lemmas
+    misses = cache.get_stats()["misses"]
+    assert SinaToolsApi.get_lemmas(text) == expected_lemmas
+    assert cache.get_stats()["misses"] == misses
@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+from utils.order_tracker import OrderTracker
+from utils.transkriptor_api import OrderStillProcessingError
+
+
+def read_pending(state_path):
+    with open(state_path, encoding="utf-8") as state_file:
+        return json.load(state_file)
+
+
+def test_trackers_sharing_a_state_file_keep_each_others_orders(tmp_path):
+    state_path = str(tmp_path / "pending_orders.json")
+    gui_tracker = OrderTracker(state_path)
+    webhook_tracker = OrderTracker(state_path)
+
+    gui_tracker.add_order(1, {"file_path": "a.wav"})
+    webhook_tracker.add_order(2)
+    assert read_pending(state_path) == {"1": {"file_path": "a.wav"}, "2": {}}
+
+    webhook_tracker.resolve_order(2, error=Exception("failed"))
+    webhook_tracker.save_state()
+    gui_tracker.add_order(3)
+    assert read_pending(state_path) == {"1": {"file_path": "a.wav"}, "3": {}}
+    assert set(OrderTracker(state_path).pending) == {"1", "3"}
+
+
+def test_completed_orders_are_yielded_and_removed_from_the_state(tmp_path):
+    state_path = str(tmp_path / "pending_orders.json")
+    polls = {"1": 0, "2": 0}
+
+    def fetch_order_status(order_id):
+        polls[order_id] += 1
+        if order_id == "2" and polls[order_id] < 3:
+            raise OrderStillProcessingError("Order is still processing")
+        return {"body": {"status": "Completed", "content": [{"text": f"order {order_id}"}]}}
+
+    async def track():
+        order_tracker = OrderTracker(state_path, initial_delay=0.01, requests_per_second=1000,
+                                     fetch_order_status=fetch_order_status)
+        order_tracker.add_order(1)
+        order_tracker.add_order(2)
+        return [(tracked_order.order_id, tracked_order.transcript)
+                async for tracked_order in order_tracker.completed()]
+
+    assert asyncio.run(track()) == [("1", "order 1"), ("2", "order 2")]
+    assert polls == {"1": 1, "2": 3}
+    assert read_pending(state_path) == {}
+
+
+def test_orders_left_after_stopping_early_stay_pending(tmp_path):
+    state_path = str(tmp_path / "pending_orders.json")
+
+    def fetch_order_status(order_id):
+        if order_id == "2":
+            raise OrderStillProcessingError("Order is still processing")
+        return {"body": {"status": "Completed", "content": "done"}}
+
+    async def track():
+        order_tracker = OrderTracker(state_path, initial_delay=0.01, requests_per_second=1000,
+                                     fetch_order_status=fetch_order_status)
+        order_tracker.add_order(2)
+        order_tracker.add_order(1)
+        async for tracked_order in order_tracker.completed():
+            if tracked_order.order_id == "1":
+                break
+
+    asyncio.run(track())
+    assert read_pending(state_path) == {"2": {}}
+
+
+def track_until_failure(order_tracker):
+    # Returns the orders yielded before completed() raised, and its error
+    async def track():
+        tracked_orders = []
+        try:
+            async for tracked_order in order_tracker.completed():
+                tracked_orders.append(tracked_order.order_id)
+        except Exception as e:
+            return tracked_orders, e
+        return tracked_orders, None
+
+    return asyncio.run(asyncio.wait_for(track(), timeout=5))
+
+
+def test_failed_state_save_is_raised_from_completed():
+    def fetch_order_status(order_id):
+        if order_id == "2":
+            raise OrderStillProcessingError("Order is still processing")
+        return {"body": {"status": "Completed", "content": "done"}}
+
+    def save_state():
+        raise OSError("disk full")
+
+    order_tracker = OrderTracker(None, initial_delay=0, requests_per_second=1000,
+                                 fetch_order_status=fetch_order_status)
+    order_tracker.add_order(1)
+    order_tracker.add_order(2)
+    order_tracker.save_state = save_state
+    tracked_orders, error = track_until_failure(order_tracker)
+    assert tracked_orders == ["1"]
+    assert isinstance(error, OSError)
+
+
+def test_failed_poll_is_raised_from_completed():
+    order_tracker = OrderTracker(None, initial_delay=0, requests_per_second=1000,
+                                 fetch_order_status=lambda order_id: "not an order status")
+    order_tracker.add_order(1)
+    tracked_orders, error = track_until_failure(order_tracker)
+    assert tracked_orders == []
+    assert isinstance(error, AttributeError)
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+import requests
+
+from utils.rate_limit import TokenBucket, is_retryable_error, is_unprocessed_request_error, rate_limited
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(response=response)
+
+
+def failing_call(errors, is_retryable):
+    # Raises the given errors one after the other, then succeeds; returns the function and its call log
+    calls = []
+
+    @rate_limited("test", model=str(id(calls)), retries=3, base_delay=0, is_retryable=is_retryable)
+    def call():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "done"
+
+    return call, calls
+
+
+def test_bucket_allows_a_burst_then_waits_for_the_refill():
+    bucket = TokenBucket(rate=50, capacity=5)
+    start_time = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start_time < 0.05
+
+    bucket.acquire()
+    assert time.monotonic() - start_time >= 0.015
+
+
+def test_paused_bucket_blocks_until_the_pause_ends():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.pause(0.05)
+    start_time = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start_time >= 0.045
+
+
+def test_idempotent_calls_retry_timeouts_and_server_errors():
+    call, calls = failing_call([requests.exceptions.ReadTimeout(), http_error(503)], is_retryable_error)
+    assert call() == "done"
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("error", [
+    requests.exceptions.ReadTimeout(),
+    requests.exceptions.ConnectionError(),
+    http_error(500),
+    http_error(502),
+])
+def test_order_creating_calls_are_not_resent_when_the_server_may_have_acted(error):
+    call, calls = failing_call([error], is_unprocessed_request_error)
+    with pytest.raises(type(error)):
+        call()
+    assert len(calls) == 1
+
+
+def test_order_creating_calls_retry_when_the_request_never_went_through():
+    call, calls = failing_call([requests.exceptions.ConnectTimeout(), http_error(429)],
+                               is_unprocessed_request_error)
+    assert call() == "done"
+    assert len(calls) == 3
@@ -0,0 +1,66 @@
+import itertools
+from types import SimpleNamespace
+
+from utils import result_cache
+from utils.result_cache import ResultCache, cached_result
+
+
+class FakeApi:
+    calls = []
+
+    @classmethod
+    @cached_result("summary", "model-a", language="ar")
+    def summarize(cls, text, language=None, progress_callback=None):
+        cls.calls.append((text, language))
+        return f"summary of {text}"
+
+
+def use_cache(monkeypatch, tmp_path, max_size_bytes=1024 * 1024):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"), max_size_bytes)
+    monkeypatch.setattr(result_cache, "get_result_cache", lambda: cache)
+    # Every access gets a later time, so the least recently used entry is well defined
+    monkeypatch.setattr(result_cache, "time", SimpleNamespace(time=itertools.count().__next__))
+    FakeApi.calls = []
+    return cache
+
+
+def test_repeated_call_is_a_hit(monkeypatch, tmp_path):
+    cache = use_cache(monkeypatch, tmp_path)
+    assert FakeApi.summarize("text") == "summary of text"
+    assert FakeApi.summarize("text", progress_callback=print) == "summary of text"
+    assert FakeApi.calls == [("text", None)]
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_key_changes_with_the_content_and_arguments(monkeypatch, tmp_path):
+    use_cache(monkeypatch, tmp_path)
+    FakeApi.summarize("text")
+    FakeApi.summarize("other text")
+    FakeApi.summarize("text", language="en")
+    FakeApi.summarize("text", "en")
+    assert FakeApi.calls == [("text", None), ("other text", None), ("text", "en")]
+
+    keys = {
+        ResultCache.build_key("FakeApi", "summary", "model-a", "ar", "hash"),
+        ResultCache.build_key("OtherApi", "summary", "model-a", "ar", "hash"),
+        ResultCache.build_key("FakeApi", "summary", "model-b", "ar", "hash"),
+        ResultCache.build_key("FakeApi", "summary", "model-a", "en", "hash"),
+        ResultCache.build_key("FakeApi", "summary", "model-a", "ar", "hash", {"service": "Standard"}),
+    }
+    assert len(keys) == 5
+
+
+def test_least_recently_used_entries_are_evicted_past_the_size_limit(monkeypatch, tmp_path):
+    # Every value takes 7 bytes ("value"), three fit
+    cache = use_cache(monkeypatch, tmp_path, max_size_bytes=21)
+    for key in ("a", "b", "c"):
+        cache.set(key, "value")
+    cache.get("a")
+    cache.set("d", "value")
+    assert [cache.get(key)[0] for key in ("a", "b", "c", "d")] == [True, False, True, True]
+    assert cache.get_stats()["size_bytes"] == 21
+
+
+def test_entries_survive_a_restart(tmp_path):
+    ResultCache(str(tmp_path / "results.sqlite3")).set("key", {"text": "نص"})
+    assert ResultCache(str(tmp_path / "results.sqlite3")).get("key") == (True, {"text": "نص"})
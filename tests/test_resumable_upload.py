@@ -0,0 +1,94 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils.resumable_upload import ResumableDriveUpload, UploadSessionStore, upload_to_presigned_url
+
+
+class FakeUploadServer(BaseHTTPRequestHandler):
+    # One Drive upload session at /session and a pre-signed URL at /presigned, recording every PUT
+    protocol_version = "HTTP/1.1"
+    stored = bytearray()
+    puts = []
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_PUT(self):
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.puts.append((self.path, dict(self.headers), data))
+        if self.path == "/presigned":
+            self.respond(200, headers={"ETag": f'"{hashlib.md5(data).hexdigest()}"'})
+            return
+
+        content_range = self.headers["Content-Range"]
+        total = int(content_range.rsplit("/", 1)[1])
+        if not content_range.startswith("bytes */"):
+            start = int(content_range.split()[1].split("-")[0])
+            assert start == len(self.stored)
+            self.stored.extend(data)
+        if len(self.stored) < total:
+            self.respond(308, headers={"Range": f"bytes=0-{len(self.stored) - 1}"})
+        else:
+            body = f'{{"id": "file", "md5Checksum": "{hashlib.md5(self.stored).hexdigest()}"}}'
+            self.respond(200, body.encode("utf-8"), {"Content-Type": "application/json"})
+
+
+@pytest.fixture
+def server_url():
+    FakeUploadServer.stored = bytearray()
+    FakeUploadServer.puts = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeUploadServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_interrupted_drive_upload_resumes_from_the_stored_offset(server_url, tmp_path):
+    file_path = tmp_path / "call.wav"
+    file_data = bytes(range(256)) * 40
+    file_path.write_bytes(file_data)
+
+    # An earlier run stored the first 4096 bytes before it stopped
+    FakeUploadServer.stored = bytearray(file_data[:4096])
+    session_store = UploadSessionStore(str(tmp_path / "upload_sessions.json"))
+    key = f"drive:{hashlib.md5(file_data).hexdigest()}:{len(file_data)}:call.wav"
+    session_store.set(key, server_url + "/session")
+
+    upload = ResumableDriveUpload(requests.Session(), chunk_size=2048, session_store=session_store)
+    uploaded_file = upload.upload(str(file_path), {"name": "call.wav"}, "audio/wav")
+    assert uploaded_file["md5Checksum"] == hashlib.md5(file_data).hexdigest()
+    assert bytes(FakeUploadServer.stored) == file_data
+    assert [headers["Content-Range"] for _, headers, _ in FakeUploadServer.puts] == [
+        f"bytes */{len(file_data)}",
+        f"bytes 4096-6143/{len(file_data)}",
+        f"bytes 6144-8191/{len(file_data)}",
+        f"bytes 8192-10239/{len(file_data)}",
+    ]
+    assert session_store.get(key) is None
+
+
+def test_presigned_upload_drops_the_api_headers(server_url, tmp_path):
+    file_path = tmp_path / "call.wav"
+    file_path.write_bytes(b"audio" * 1000)
+    http_session = requests.Session()
+    http_session.headers.update({"Authorization": "Bearer secret", "Accept": "application/json"})
+
+    upload_to_presigned_url(http_session, server_url + "/presigned", str(file_path))
+    [(path, headers, data)] = FakeUploadServer.puts
+    assert path == "/presigned" and data == b"audio" * 1000
+    assert "Authorization" not in headers
+    assert "Accept" not in headers
+    # The API session itself keeps them for the next calls
+    assert http_session.headers["Authorization"] == "Bearer secret"
@@ -0,0 +1,12 @@
+import os
+
+from utils.sina_tools_api import SinaToolsApi, get_default_processes
+
+
+def test_sinatools_processes_are_bounded_by_the_cores():
+    assert 1 <= get_default_processes() <= min(4, os.cpu_count() or 1)
+    try:
+        SinaToolsApi.configure(1024)
+        assert SinaToolsApi.processes == (os.cpu_count() or 1)
+    finally:
+        SinaToolsApi.configure(1)
@@ -0,0 +1,54 @@
+import threading
+import time
+
+from utils.staged_pipeline import PipelineStage, StagedPipeline
+
+
+def test_jobs_go_through_every_stage_in_order():
+    stages = [
+        PipelineStage("double", lambda data: data.update(value=data["value"] * 2)),
+        PipelineStage("increment", lambda data: data.update(value=data["value"] + 1)),
+    ]
+    jobs = list(StagedPipeline(stages).run(range(10), build_data=lambda item: {"value": item}))
+    assert [job.item for job in jobs] == list(range(10))
+    assert [job.data["value"] for job in jobs] == [item * 2 + 1 for item in range(10)]
+
+
+def test_bounded_queues_hold_back_the_first_stage():
+    started, lock = [], threading.Lock()
+    in_flight = []
+
+    def read(data):
+        with lock:
+            started.append(data["item"])
+
+    def slow_write(data):
+        with lock:
+            in_flight.append(len(started) - data["item"])
+        time.sleep(0.005)
+
+    stages = [PipelineStage("read", read), PipelineStage("write", slow_write)]
+    pipeline = StagedPipeline(stages, queue_size=2)
+    jobs = list(pipeline.run(range(30), build_data=lambda item: {"item": item}))
+    assert len(jobs) == 30
+    # At most both queues plus one job per worker are ahead of the slow stage
+    assert max(in_flight) <= 2 * 2 + 2
+
+
+def test_failed_job_skips_the_remaining_stages_and_the_others_go_on():
+    finished = []
+
+    def transcribe(data):
+        if data["item"] == 2:
+            raise ValueError("bad audio")
+
+    stages = [
+        PipelineStage("transcribe", transcribe, workers=2),
+        PipelineStage("save", lambda data: finished.append(data["item"]), workers=2),
+    ]
+    jobs = {job.item: job for job in StagedPipeline(stages).run(range(5), build_data=lambda item: {"item": item})}
+    assert sorted(jobs) == [0, 1, 2, 3, 4]
+    assert isinstance(jobs[2].error, ValueError)
+    assert jobs[2].failed_stage == "transcribe"
+    assert sorted(finished) == [0, 1, 3, 4]
+    assert all(jobs[item].error is None for item in (0, 1, 3, 4))
@@ -0,0 +1,39 @@
+import pytest
+
+from utils import summarization
+from utils.nlp_cloud_api import NLPCloudApi
+
+
+def summarize_with(monkeypatch, summarize):
+    requests = []
+
+    def generate_summary_from_text(text):
+        requests.append(text)
+        return summarize(text)
+
+    monkeypatch.setattr(NLPCloudApi, "generate_summary_from_text", generate_summary_from_text)
+    return requests
+
+
+def test_long_text_is_reduced_until_the_final_request_fits(monkeypatch):
+    requests = summarize_with(monkeypatch, lambda text: text.split()[0].strip(".") + " summary.")
+    text = " ".join(f"word{index} word word word." for index in range(20))
+    assert summarization.summarize_long_text(text, section_tokens=20) == "word0 summary."
+    assert all(summarization.estimate_tokens(request) <= 20 for request in requests)
+
+
+def test_summaries_that_do_not_shrink_fail_clearly(monkeypatch):
+    requests = summarize_with(monkeypatch, lambda text: text)
+    with pytest.raises(Exception, match="not shorter"):
+        summarization.summarize_long_text("a b c d. e f g h. i j k l.", section_tokens=8)
+    assert len(requests) == 3
+
+
+def test_text_still_over_budget_after_the_last_round_is_not_sent(monkeypatch):
+    # Every round only drops one word per section
+    requests = summarize_with(monkeypatch, lambda text: " ".join(text.split()[1:]) + ".")
+    monkeypatch.setattr(summarization, "MAX_REDUCE_ROUNDS", 1)
+    text = " ".join(f"w{index} x y z." for index in range(10))
+    with pytest.raises(Exception, match="after 1 rounds"):
+        summarization.summarize_long_text(text, section_tokens=16)
+    assert all(summarization.estimate_tokens(request) <= 16 for request in requests)
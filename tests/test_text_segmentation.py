@@ -0,0 +1,35 @@
+from utils.text_segmentation import (
+    estimate_tokens, split_into_sections, split_into_shards, split_sentence_spans, split_sentences,
+)
+
+
+def test_sentences_end_at_latin_and_arabic_punctuation():
+    assert split_sentences("مرحبا. كيف حالك؟! بخير\nشكرا...") == ["مرحبا.", "كيف حالك؟!", "بخير", "شكرا..."]
+
+
+def test_sections_pack_whole_sentences_within_the_budget():
+    text = "one two. three four five. six. seven eight nine ten."
+    assert split_into_sections(text, 10, estimate_tokens) == ["one two. three four five.", "six. seven eight nine ten."]
+    assert split_into_sections(text, 100, estimate_tokens) == [text]
+
+
+def test_sentences_over_the_budget_are_cut_between_words():
+    sections = split_into_sections("a b c d e f g h", 6, estimate_tokens)
+    assert sections == ["a b c", "d e f", "g h"]
+    assert all(estimate_tokens(section) <= 6 for section in sections)
+
+
+def test_shards_keep_every_sentence_in_order():
+    text = " ".join(f"sentence number {index}." for index in range(40))
+    shards = split_into_shards(text, 4)
+    assert len(shards) == 4
+    assert " ".join(shards) == text
+
+
+def test_sentence_spans_give_the_text_back():
+    text = "  مرحبا.  كيف حالك؟!\n\nبخير a b  c\td e f g.\nشكرا  "
+    spans = split_sentence_spans(text, 6, estimate_tokens)
+    assert spans == [
+        ("مرحبا.", "  "), ("كيف حالك؟!", "\n\n"), ("بخير a b", "  "), ("c\td e", " "), ("f g.", "\n"), ("شكرا", "  "),
+    ]
+    assert "".join(sentence + separator for sentence, separator in spans) == text.lstrip()
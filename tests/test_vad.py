@@ -0,0 +1,81 @@
+import numpy as np
+from pydub import AudioSegment
+
+from utils.audio_chunking import get_speech_windows, join_window_transcripts
+from utils.vad import get_speech_segments
+
+FRAME_RATE = 16000
+
+
+def make_audio(parts, channels=1):
+    # parts are (milliseconds, amplitude) of a 220 Hz tone over quiet noise, amplitude 0 is silence
+    rng = np.random.default_rng(0)
+    pieces = []
+    for milliseconds, amplitude in parts:
+        time = np.arange(int(FRAME_RATE * milliseconds / 1000)) / FRAME_RATE
+        pieces.append(amplitude * np.sin(2 * np.pi * 220 * time) + rng.normal(0, 0.001, len(time)))
+    samples = (np.concatenate(pieces) * 32767).astype(np.int16)
+    samples = np.repeat(samples, channels)
+    return AudioSegment(samples.tobytes(), frame_rate=FRAME_RATE, sample_width=2, channels=channels)
+
+
+def assert_segments_close(segments, expected_segments, tolerance_ms=60):
+    assert len(segments) == len(expected_segments)
+    for (start_ms, end_ms), (expected_start, expected_end) in zip(segments, expected_segments):
+        assert abs(start_ms - expected_start) <= tolerance_ms
+        assert abs(end_ms - expected_end) <= tolerance_ms
+
+
+def test_speech_segments_are_found_between_silences():
+    audio = make_audio([(1000, 0), (2000, 0.5), (1000, 0), (1500, 0.3), (1000, 0)])
+    segments = get_speech_segments(audio, padding_ms=0)
+    assert_segments_close(segments, [(1000, 3000), (4000, 5500)])
+
+
+def test_speech_segments_are_padded_within_the_audio():
+    audio = make_audio([(100, 0), (1000, 0.5), (1000, 0)])
+    segments = get_speech_segments(audio, padding_ms=200)
+    assert_segments_close(segments, [(0, 1300)])
+
+
+def test_short_pauses_are_bridged_and_short_bursts_dropped():
+    audio = make_audio([(1000, 0), (1000, 0.5), (300, 0), (1000, 0.5), (1000, 0), (100, 0.5), (1000, 0)])
+    segments = get_speech_segments(audio, padding_ms=0)
+    assert_segments_close(segments, [(1000, 3300)])
+
+
+def test_stereo_audio_and_silence():
+    audio = make_audio([(1000, 0), (1000, 0.5), (1000, 0)], channels=2)
+    assert_segments_close(get_speech_segments(audio, padding_ms=0), [(1000, 2000)])
+    assert get_speech_segments(make_audio([(2000, 0)])) == []
+
+
+def test_speech_windows_pack_segments_up_to_the_window():
+    segments = [(0, 400), (1000, 1500), (2000, 2300), (3000, 3600)]
+    assert get_speech_windows(segments, window_ms=1000, overlap_ms=100) == [
+        [(0, 400), (1000, 1500)],
+        [(2000, 2300), (3000, 3600)],
+    ]
+
+
+def test_speech_windows_split_long_segments_with_overlap():
+    segments = [(0, 400), (1000, 3500), (4000, 4200)]
+    assert get_speech_windows(segments, window_ms=1000, overlap_ms=100) == [
+        [(0, 400)],
+        [(1000, 2000)],
+        [(1900, 2900)],
+        [(2800, 3500)],
+        [(4000, 4200)],
+    ]
+
+
+def test_transcripts_of_separate_segments_are_joined_without_stitching():
+    windows = [[(0, 400)], [(1000, 2000)]]
+    texts = ["he said the city of cairo is big", "the city of cairo is big indeed"]
+    assert join_window_transcripts(windows, texts, overlap_ms=2000) == " ".join(texts)
+
+
+def test_transcripts_of_a_split_segment_are_stitched():
+    windows = [[(0, 400)], [(1000, 2000)], [(1900, 2900)], [(4000, 4200)]]
+    texts = ["hello", "one two three four five six", "three four five six seven", "bye"]
+    assert join_window_transcripts(windows, texts, overlap_ms=2000) == "hello one two three four five six seven bye"
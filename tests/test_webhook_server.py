@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from utils.order_tracker import OrderTracker
+from utils.webhook_server import TranskriptorWebhookServer, get_webhook_order_id
+
+COMPLETED_ORDER = {"body": {"status": "Completed", "content": [{"text": "hello"}, {"text": "world"}]}}
+
+
+async def post(port, target, payload):
+    # Sends one webhook the way Transkriptor does and returns the response status
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {target} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def receive_webhooks(requests):
+    # Returns the response statuses, the orders fetched after a webhook and the orders the tracker yielded
+    fetched_orders = []
+
+    def fetch_order_status(order_id):
+        fetched_orders.append(order_id)
+        return COMPLETED_ORDER
+
+    # Orders are only polled after an hour, within the test they can only complete through a webhook
+    order_tracker = OrderTracker(None, initial_delay=3600, fetch_order_status=fetch_order_status)
+    order_tracker.add_order(42, {"file_path": "call.wav"})
+    webhook_server = TranskriptorWebhookServer(order_tracker, port=0, secret="s3cret")
+    server = await webhook_server.start()
+    port = server.sockets[0].getsockname()[1]
+
+    completed_orders = order_tracker.completed()
+    next_order = asyncio.ensure_future(completed_orders.__anext__())
+    try:
+        statuses = [await post(port, target, payload) for target, payload in requests]
+        done, _ = await asyncio.wait([next_order], timeout=1)
+        tracked_orders = [next_order.result()] if done else []
+        return statuses, fetched_orders, tracked_orders
+    finally:
+        next_order.cancel()
+        await asyncio.gather(next_order, return_exceptions=True)
+        await completed_orders.aclose()
+        await webhook_server.close()
+
+
+def test_webhook_resolves_the_pending_order():
+    statuses, fetched_orders, tracked_orders = asyncio.run(receive_webhooks([
+        ("/transkriptor/webhook?token=s3cret", {"event": "transcription_completed", "order_id": 42}),
+    ]))
+    assert statuses == [200]
+    assert fetched_orders == ["42"]
+    assert [(order.order_id, order.metadata, order.transcript) for order in tracked_orders] == [
+        ("42", {"file_path": "call.wav"}, "hello world"),
+    ]
+
+
+def test_rejected_and_unknown_webhooks_leave_the_order_pending():
+    statuses, fetched_orders, tracked_orders = asyncio.run(receive_webhooks([
+        ("/transkriptor/webhook?token=wrong", {"order_id": 42}),
+        ("/other/path?token=s3cret", {"order_id": 42}),
+        ("/transkriptor/webhook?token=s3cret", {"event": "transcription_completed"}),
+        ("/transkriptor/webhook?token=s3cret", {"order_id": 7}),
+    ]))
+    assert statuses == [403, 404, 400, 200]
+    assert fetched_orders == []
+    assert tracked_orders == []
+
+
+def test_webhook_order_id_is_found_in_nested_bodies():
+    assert get_webhook_order_id({"body": {"file_id": 5}}) == "5"
+    assert get_webhook_order_id({"order_id": ""}) is None
+
+
+def test_server_listens_on_localhost_by_default():
+    assert TranskriptorWebhookServer(OrderTracker(None)).host == "127.0.0.1"
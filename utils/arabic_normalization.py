@@ -0,0 +1,43 @@
+import re
+
+# Harakat, shadda, sukun, superscript alef and the Quranic annotation marks
+DIACRITICS = (
+    [chr(code) for code in range(0x0610, 0x061B)]
+    + [chr(code) for code in range(0x064B, 0x0660)]
+    + ["\u0670"]
+    + [chr(code) for code in range(0x06D6, 0x06EE)]
+)
+TATWEEL = "\u0640"
+ZERO_WIDTH_CHARACTERS = ["\u200b", "\u200c", "\u200d", "\u200e", "\u200f", "\ufeff"]
+# Arabic-Indic and Eastern Arabic-Indic digits to ASCII digits
+DIGITS = {chr(0x0660 + digit): str(digit) for digit in range(10)}
+DIGITS.update({chr(0x06F0 + digit): str(digit) for digit in range(10)})
+PUNCTUATION = {"،": ",", "؛": ";", "؟": "?", "٪": "%", "٫": ".", "٬": ",", "«": '"', "»": '"', "۔": "."}
+ALEF_FORMS = {"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا"}
+LETTER_FORMS = dict(ALEF_FORMS, **{"ى": "ي", "ة": "ه"})
+
+# Light normalization keeps the diacritics and letter forms the morphological analyzer relies on
+LIGHT_TABLE = str.maketrans(dict(
+    {character: None for character in [TATWEEL] + ZERO_WIDTH_CHARACTERS}, **DIGITS, **PUNCTUATION
+))
+# Full folding maps spelling variants of a word to one key, for keyword detection and fuzzy matching
+FOLD_TABLE = str.maketrans(dict(
+    {character: None for character in DIACRITICS + [TATWEEL] + ZERO_WIDTH_CHARACTERS},
+    **DIGITS, **PUNCTUATION, **LETTER_FORMS
+))
+
+SPACES_PATTERN = re.compile(r"[^\S\n]+")
+
+
+def normalize_text(text):
+    # Run once on a whole transcript before tokenization
+    return SPACES_PATTERN.sub(" ", text.translate(LIGHT_TABLE)).strip()
+
+
+def fold_text(text):
+    return SPACES_PATTERN.sub(" ", text.translate(FOLD_TABLE)).strip()
+
+
+def fold_tokens(tokens):
+    # One translate over all tokens instead of one call per token, tokens keep their positions
+    return "\n".join(tokens).translate(FOLD_TABLE).split("\n") if tokens else []
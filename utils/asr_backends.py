@@ -0,0 +1,241 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils.audio_chunking import DEFAULT_WINDOW_MS
+from utils.audio_preprocessing import export_audio
+from utils.nlp_cloud_api import NLPCloudApi
+from utils.transkriptor_api import OrderStillProcessingError, TranskriptorApi
+from utils.utils import get_audio_duration
+
+# Whisper decodes fixed 30 second windows, only segments that fit in one can be batched
+WHISPER_WINDOW_MS = 30 * 1000
+# Every whisper worker process holds its own copy of the model (about 1.5 GB for turbo),
+# overridden with WHISPER_MAX_WORKERS
+DEFAULT_MAX_WHISPER_WORKERS = 2
+
+_whisper_models = {}
+_whisper_models_lock = threading.Lock()
+
+
+def load_whisper_model(model_name):
+    # Whisper weights are loaded once per process and kept warm for every later file
+    with _whisper_models_lock:
+        if model_name not in _whisper_models:
+            import whisper
+
+            _whisper_models[model_name] = whisper.load_model(model_name)
+        return _whisper_models[model_name]
+
+
+def get_max_whisper_workers():
+    return int(os.getenv("WHISPER_MAX_WORKERS", DEFAULT_MAX_WHISPER_WORKERS))
+
+
+def _init_whisper_worker(model_name, threads):
+    if threads:
+        import torch
+
+        torch.set_num_threads(threads)
+    load_whisper_model(model_name)
+
+
+def _transcribe_with_whisper(file_path, model_name, language):
+    model = load_whisper_model(model_name)
+    result = model.transcribe(file_path, fp16=False, language=language)
+    return result["text"]
+
+
+def _transcribe_batch_with_whisper(file_paths, model_name, language):
+    # Pads every segment to the 30 second window, stacks their log-mel spectrograms
+    # into one tensor and decodes the whole batch in a single pass
+    import torch
+    import whisper
+
+    model = load_whisper_model(model_name)
+    mels = [
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(whisper.load_audio(file_path)), n_mels=model.dims.n_mels)
+        for file_path in file_paths
+    ]
+    mel_batch = torch.stack(mels).to(model.device)
+    options = whisper.DecodingOptions(language=language, fp16=False, without_timestamps=True)
+    with torch.no_grad():
+        results = whisper.decode(model, mel_batch, options)
+    return [result.text for result in results]
+
+
+class AsrBackend:
+    # Common interface of every speech-to-text engine: transcribe(segments) takes a list of audio
+    # file paths and returns their texts in the same order
+    name = None
+    # Longest audio the backend should get in one segment, longer recordings are chunked
+    max_segment_ms = DEFAULT_WINDOW_MS
+
+    def __init__(self, workers=1):
+        self.workers = max(1, workers)
+
+    def transcribe_file(self, file_path):
+        raise NotImplementedError
+
+    def transcribe(self, segments):
+        if self.workers == 1 or len(segments) == 1:
+            return [self.transcribe_file(segment) for segment in segments]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self.transcribe_file, segments))
+
+
+class NLPCloudAsrBackend(AsrBackend):
+    name = "nlpcloud"
+
+    def transcribe_file(self, file_path):
+        return NLPCloudApi.generate_speech_to_text_from_local_file(file_path)
+
+
+class TranskriptorAsrBackend(AsrBackend):
+    name = "transkriptor"
+
+    def __init__(self, workers=1, poll_interval=10, timeout=30 * 60, language="ar-SA"):
+        super().__init__(workers)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.language = language
+
+    def transcribe_file(self, file_path):
+        order_id = TranskriptorApi.transcribe_local_file(file_path, language=self.language)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                order_status = TranskriptorApi.get_order_status(order_id)
+                return TranskriptorApi.get_transcript_text(order_status)
+            except OrderStillProcessingError:
+                if time.monotonic() > deadline:
+                    raise
+            time.sleep(self.poll_interval)
+
+
+class SpeechRecognitionAsrBackend(AsrBackend):
+    name = "google"
+
+    def __init__(self, workers=1, language="ar-AR"):
+        super().__init__(workers)
+        self.language = language
+
+    def transcribe_file(self, file_path):
+        import speech_recognition as sr
+
+        # sr.AudioFile only reads WAV, AIFF and FLAC, other formats (MP3, Opus) get a temporary WAV copy
+        wav_path = None
+        if os.path.splitext(file_path)[1].lower() not in (".wav", ".aif", ".aiff", ".flac"):
+            from pydub import AudioSegment
+
+            wav_path = export_audio(AudioSegment.from_file(file_path), "wav")
+
+        try:
+            recognizer = sr.Recognizer()
+            with sr.AudioFile(wav_path or file_path) as audio_file:
+                audio_data = recognizer.record(audio_file)
+        finally:
+            if wav_path is not None:
+                os.remove(wav_path)
+        return recognizer.recognize_google(audio_data, language=self.language)
+
+
+class WhisperLocalAsrBackend(AsrBackend):
+    # Runs Whisper on this machine. With one worker the model lives in this process, with more
+    # every worker process of a long-lived pool loads it once when it starts.
+    # With batch_size > 1 segments of up to 30 seconds are decoded together in batches.
+    name = "whisper"
+
+    def __init__(self, workers=1, model_name="turbo", language="ar", batch_size=1, threads=None):
+        max_workers = max(1, min(get_max_whisper_workers(), os.cpu_count() or 1))
+        if workers > max_workers:
+            print(f"Whisper uses {max_workers} worker processes instead of {workers}, "
+                  f"set WHISPER_MAX_WORKERS to allow more", file=sys.stderr)
+        super().__init__(min(workers, max_workers))
+        # The worker processes share the cores instead of each starting one torch thread per core
+        if threads is None and self.workers > 1:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self.model_name = model_name
+        self.language = language
+        self.batch_size = max(1, batch_size)
+        self.threads = threads
+        self.max_segment_ms = WHISPER_WINDOW_MS if self.batch_size > 1 else DEFAULT_WINDOW_MS
+        self.executor = None
+        self.lock = threading.Lock()
+        self.initialized = False
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                # Spawned, not forked: a fork would copy this process's threads, locks and loaded torch state
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_whisper_worker,
+                    initargs=(self.model_name, self.threads),
+                )
+            return self.executor
+
+    def run(self, function, *args):
+        if self.workers > 1:
+            return self.get_executor().submit(function, *args)
+
+        # One decode at a time on the in-process model, whose kv-cache hooks are not safe to share between
+        # threads. The work is wrapped in a completed Future to match the pool.
+        with self.lock:
+            if not self.initialized:
+                _init_whisper_worker(self.model_name, self.threads)
+                self.initialized = True
+            result = function(*args)
+        future = Future()
+        future.set_result(result)
+        return future
+
+    def transcribe_file(self, file_path):
+        return self.run(_transcribe_with_whisper, file_path, self.model_name, self.language).result()
+
+    def transcribe(self, segments):
+        # Segments longer than the Whisper window cannot be padded into a batch and are transcribed alone
+        if self.batch_size > 1:
+            batchable = [get_audio_duration(segment) * 1000 <= WHISPER_WINDOW_MS for segment in segments]
+        else:
+            batchable = [False] * len(segments)
+
+        short_segments = [segment for segment, is_short in zip(segments, batchable) if is_short]
+        long_futures = [
+            self.run(_transcribe_with_whisper, segment, self.model_name, self.language)
+            for segment, is_short in zip(segments, batchable) if not is_short
+        ]
+        batch_futures = [
+            self.run(_transcribe_batch_with_whisper, short_segments[start:start + self.batch_size],
+                     self.model_name, self.language)
+            for start in range(0, len(short_segments), self.batch_size)
+        ]
+
+        short_texts = iter([text for future in batch_futures for text in future.result()])
+        long_texts = iter([future.result() for future in long_futures])
+        return [next(short_texts) if is_short else next(long_texts) for is_short in batchable]
+
+
+ASR_BACKENDS = {
+    backend.name: backend
+    for backend in (NLPCloudAsrBackend, TranskriptorAsrBackend, SpeechRecognitionAsrBackend, WhisperLocalAsrBackend)
+}
+
+_asr_backends = {}
+_asr_backends_lock = threading.Lock()
+
+
+def get_asr_backend(name="nlpcloud", **options):
+    # Backends are shared per configuration, so a local Whisper model or worker pool is built only once
+    key = (name, tuple(sorted(options.items())))
+    with _asr_backends_lock:
+        if key not in _asr_backends:
+            if name not in ASR_BACKENDS:
+                raise ValueError(f"Unknown ASR backend: {name}")
+            _asr_backends[key] = ASR_BACKENDS[name](**options)
+        return _asr_backends[key]
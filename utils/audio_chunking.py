@@ -0,0 +1,167 @@
+import os
+
+from utils.audio_preprocessing import DEFAULT_AUDIO_FORMAT, export_audio
+from utils.utils import get_audio_duration
+
+DEFAULT_WINDOW_MS = 120 * 1000
+DEFAULT_OVERLAP_MS = 5 * 1000
+DEFAULT_CHUNK_WORKERS = 4
+
+# Speech rate used to size the run of words repeated at a seam
+WORDS_PER_SECOND = 2
+MIN_OVERLAP_WORDS = 4
+# Words cut in half at a chunk edge, at the end of one chunk and the start of the next
+MAX_EDGE_WORDS = 2
+
+PUNCTUATION = ".,،؛;:!?؟\"'()[]-…"
+
+
+def get_chunk_windows(duration_ms, window_ms=DEFAULT_WINDOW_MS, overlap_ms=DEFAULT_OVERLAP_MS):
+    if overlap_ms >= window_ms:
+        raise ValueError("Chunk overlap must be shorter than the chunk window.")
+
+    windows = []
+    start_ms = 0
+    while True:
+        end_ms = min(start_ms + window_ms, duration_ms)
+        windows.append((start_ms, end_ms))
+        if end_ms >= duration_ms:
+            return windows
+        start_ms = end_ms - overlap_ms
+
+
+def get_speech_windows(speech_segments, window_ms=DEFAULT_WINDOW_MS, overlap_ms=DEFAULT_OVERLAP_MS):
+    # Packs consecutive speech segments into windows of at most window_ms of speech, so chunks are cut
+    # at pauses and the silence between segments is never sent. A window is a list of (start_ms, end_ms)
+    # spans; only segments longer than a whole window are split with overlap.
+    windows = []
+    current_window, current_length = [], 0
+    for start_ms, end_ms in speech_segments:
+        if end_ms - start_ms > window_ms:
+            if current_window:
+                windows.append(current_window)
+                current_window, current_length = [], 0
+            for span_start, span_end in get_chunk_windows(end_ms - start_ms, window_ms, overlap_ms):
+                windows.append([(start_ms + span_start, start_ms + span_end)])
+            continue
+
+        if current_length + end_ms - start_ms > window_ms:
+            windows.append(current_window)
+            current_window, current_length = [], 0
+        current_window.append((start_ms, end_ms))
+        current_length += end_ms - start_ms
+
+    if current_window:
+        windows.append(current_window)
+    return windows
+
+
+def export_audio_chunk(audio, spans, audio_format=DEFAULT_AUDIO_FORMAT):
+    # Every chunk gets its own temporary file so that chunks can be transcribed concurrently
+    chunk = audio[spans[0][0]:spans[0][1]]
+    for start_ms, end_ms in spans[1:]:
+        chunk += audio[start_ms:end_ms]
+    return export_audio(chunk, audio_format)
+
+
+def transcribe_audio_chunks(audio, windows, asr_backend, audio_format=DEFAULT_AUDIO_FORMAT):
+    chunk_paths = []
+    try:
+        for spans in windows:
+            chunk_paths.append(export_audio_chunk(audio, spans, audio_format))
+        return asr_backend.transcribe(chunk_paths)
+    finally:
+        for chunk_path in chunk_paths:
+            os.remove(chunk_path)
+
+
+def _normalize_word(word):
+    return word.strip(PUNCTUATION)
+
+
+def get_overlap_word_limits(overlap_ms):
+    # (min, max) length of the run of words that two chunks overlapping by overlap_ms can share
+    expected_words = overlap_ms / 1000 * WORDS_PER_SECOND
+    return max(MIN_OVERLAP_WORDS, int(expected_words / 2)), int(expected_words * 2) + MAX_EDGE_WORDS
+
+
+def find_seam(tail, head, min_overlap_words):
+    # The longest run of words that ends the tail and starts the head, up to MAX_EDGE_WORDS words
+    # (cut in half at the chunk edges) ignored at the two ends together.
+    # Returns (tail_end, head_end) after the run, or None.
+    for length in range(min(len(tail), len(head)), min_overlap_words - 1, -1):
+        for edge_words in range(MAX_EDGE_WORDS + 1):
+            for tail_skip in range(edge_words + 1):
+                head_skip = edge_words - tail_skip
+                tail_end = len(tail) - tail_skip
+                head_end = head_skip + length
+                if tail_end - length < 0 or head_end > len(head):
+                    continue
+                run = tail[tail_end - length:tail_end]
+                if all(run) and run == head[head_skip:head_end]:
+                    return tail_end, head_end
+    return None
+
+
+def stitch_transcripts(texts, overlap_ms=DEFAULT_OVERLAP_MS):
+    # Consecutive chunks overlap by overlap_ms, so the end of one transcript repeats at the start of the next.
+    # That repeated run has to end the text so far and start the next chunk, and be about as long as
+    # overlap_ms of speech; it is kept once. A shorter or misplaced run is more likely a phrase said twice
+    # than the seam, then the texts are only joined.
+    min_overlap_words, max_overlap_words = get_overlap_word_limits(overlap_ms)
+    stitched_words = []
+    for text in texts:
+        words = text.split()
+        tail = [_normalize_word(word) for word in stitched_words[-max_overlap_words:]]
+        head = [_normalize_word(word) for word in words[:max_overlap_words]]
+
+        seam = find_seam(tail, head, min_overlap_words)
+        if seam is not None:
+            tail_end, head_end = seam
+            stitched_words = stitched_words[:len(stitched_words) - len(tail) + tail_end] + words[head_end:]
+        else:
+            stitched_words += words
+
+    return " ".join(stitched_words)
+
+
+def join_window_transcripts(windows, texts, overlap_ms=DEFAULT_OVERLAP_MS):
+    # Only consecutive windows cut from the same stretch of audio overlap and are stitched,
+    # windows of separate speech segments share no audio and their transcripts are just joined
+    groups = []
+    previous_end_ms = None
+    for spans, text in zip(windows, texts):
+        if previous_end_ms is not None and spans[0][0] < previous_end_ms:
+            groups[-1].append(text)
+        else:
+            groups.append([text])
+        previous_end_ms = spans[-1][1]
+
+    stitched_texts = [stitch_transcripts(group, overlap_ms) for group in groups]
+    return " ".join(text for text in stitched_texts if text)
+
+
+def transcribe_long_audio(file_path, asr_backend, window_ms=None, overlap_ms=DEFAULT_OVERLAP_MS, use_vad=False,
+                          audio_format=DEFAULT_AUDIO_FORMAT):
+    # Short files are sent as they are, longer ones are cut into overlapping windows
+    # that the ASR backend transcribes concurrently and that are stitched back in order.
+    # With use_vad only the voiced parts of the audio are sent, cut at pauses and joined back without stitching.
+    # Chunks are sent in audio_format, or the default format when the file is sent as it is.
+    window_ms = window_ms or asr_backend.max_segment_ms
+    if not use_vad and get_audio_duration(file_path) * 1000 <= window_ms:
+        return asr_backend.transcribe([file_path])[0]
+
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(file_path)
+    if use_vad:
+        from utils.vad import get_speech_segments
+
+        windows = get_speech_windows(get_speech_segments(audio), window_ms, overlap_ms)
+        if not windows:
+            return ""
+    else:
+        windows = [[window] for window in get_chunk_windows(len(audio), window_ms, overlap_ms)]
+
+    texts = transcribe_audio_chunks(audio, windows, asr_backend, audio_format or DEFAULT_AUDIO_FORMAT)
+    return join_window_transcripts(windows, texts, overlap_ms)
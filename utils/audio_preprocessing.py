@@ -0,0 +1,65 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+TARGET_FRAME_RATE = 16000
+TARGET_DBFS = -20.0
+MAX_PEAK_DBFS = -1.0
+
+# Output format -> (ffmpeg format, extra ffmpeg parameters, file extension, MIME type)
+EXPORT_FORMATS = {
+    "wav": ("wav", [], ".wav", "audio/wav"),
+    "flac": ("flac", [], ".flac", "audio/flac"),
+    "opus": ("ogg", ["-c:a", "libopus", "-b:a", "24k", "-application", "voip"], ".ogg", "audio/ogg"),
+}
+# Lossless and about half the size of 16-bit WAV
+DEFAULT_AUDIO_FORMAT = "flac"
+MIME_TYPES = {".wav": "audio/wav", ".mp3": "audio/mpeg", ".flac": "audio/flac", ".ogg": "audio/ogg"}
+
+
+def get_mime_type(file_path):
+    return MIME_TYPES.get(os.path.splitext(file_path)[1].lower(), "audio/mpeg")
+
+
+def normalize_audio(audio, frame_rate=TARGET_FRAME_RATE, target_dbfs=TARGET_DBFS):
+    # Speech models only need 16 kHz mono, anything more is upload size for nothing
+    audio = audio.set_channels(1).set_frame_rate(frame_rate).set_sample_width(2)
+
+    # Loudness normalization, without pushing the peaks into clipping
+    if audio.dBFS != float("-inf"):
+        audio = audio.apply_gain(min(target_dbfs - audio.dBFS, MAX_PEAK_DBFS - audio.max_dBFS))
+    return audio
+
+
+def export_audio(audio, output_format=DEFAULT_AUDIO_FORMAT):
+    # Exports to a new temporary file and returns its path, the caller removes it
+    export_format, parameters, extension, _ = EXPORT_FORMATS[output_format]
+    file_descriptor, export_path = tempfile.mkstemp(suffix=extension)
+    os.close(file_descriptor)
+    try:
+        # Without parameters pydub writes WAV itself instead of going through ffmpeg
+        audio.export(export_path, format=export_format, parameters=parameters or None)
+    except Exception:
+        os.remove(export_path)
+        raise
+    return export_path
+
+
+@contextmanager
+def prepared_audio_file(file_path, output_format=DEFAULT_AUDIO_FORMAT):
+    # Yields the path of a normalized temporary copy of the file that is removed afterwards,
+    # or the original path when output_format is None or the original is smaller (e.g. a compressed MP3)
+    if output_format is None:
+        yield file_path
+        return
+
+    from pydub import AudioSegment
+
+    prepared_path = export_audio(normalize_audio(AudioSegment.from_file(file_path)), output_format)
+    try:
+        if os.path.getsize(prepared_path) < os.path.getsize(file_path):
+            yield prepared_path
+        else:
+            yield file_path
+    finally:
+        os.remove(prepared_path)
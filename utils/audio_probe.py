@@ -0,0 +1,166 @@
+import os
+import struct
+from collections import namedtuple
+
+AudioInfo = namedtuple("AudioInfo", ["duration_ms", "sample_rate", "channels"])
+
+# Bitrates in kbps by (MPEG version 1, layer) and (MPEG version 2/2.5, layer), indexed by the header bitrate bits
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+MP3_SEARCH_BYTES = 64 * 1024
+
+
+def probe_wav(binary_file, file_size):
+    header = binary_file.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+
+    byte_rate = sample_rate = channels = None
+    while True:
+        chunk_header = binary_file.read(8)
+        if len(chunk_header) < 8:
+            return None
+        chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+
+        if chunk_id == b"fmt ":
+            fmt = binary_file.read(chunk_size + chunk_size % 2)
+            _, channels, sample_rate, byte_rate = struct.unpack("<HHII", fmt[:12])
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streams written without knowing their length leave the data size unset or too large
+            data_size = min(chunk_size, file_size - binary_file.tell())
+            return AudioInfo(data_size * 1000 / byte_rate, sample_rate, channels)
+        else:
+            binary_file.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+def probe_flac(binary_file, file_size):
+    # The STREAMINFO block, always first after the "fLaC" marker, holds the rate, channels and sample count
+    header = binary_file.read(42)
+    if len(header) < 42 or header[:4] != b"fLaC" or header[4] & 0x7F != 0:
+        return None
+
+    stream_info = int.from_bytes(header[18:26], "big")
+    sample_rate = stream_info >> 44
+    channels = ((stream_info >> 41) & 0x7) + 1
+    total_samples = stream_info & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return AudioInfo(total_samples * 1000 / sample_rate, sample_rate, channels)
+
+
+def _parse_mp3_frame_header(header):
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+
+    version = {0: 2.5, 2: 2, 3: 1}.get((header[1] >> 3) & 3)
+    layer = {1: 3, 2: 2, 3: 1}.get((header[1] >> 1) & 3)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+    padding = (header[2] >> 1) & 1
+    channels = 1 if header[3] >> 6 == 3 else 2
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if version == 1 or layer == 2 else 576
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+
+    return {
+        "version": version,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "samples_per_frame": samples_per_frame,
+        "frame_length": frame_length,
+    }
+
+
+def probe_mp3(binary_file, file_size):
+    # Skip the ID3v2 tag, whose size is stored as a 28 bit syncsafe integer
+    audio_start = 0
+    header = binary_file.read(10)
+    if len(header) == 10 and header[:3] == b"ID3":
+        tag_size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        audio_start = 10 + tag_size + (10 if header[5] & 0x10 else 0)
+
+    binary_file.seek(audio_start)
+    data = binary_file.read(MP3_SEARCH_BYTES)
+
+    # The first frame is the first sync word whose following frame also starts with a sync word
+    frame = None
+    offset = data.find(b"\xff")
+    while offset != -1 and offset + 4 <= len(data):
+        frame = _parse_mp3_frame_header(data[offset:offset + 4])
+        if frame:
+            next_offset = offset + frame["frame_length"]
+            if next_offset + 4 > len(data) or _parse_mp3_frame_header(data[next_offset:next_offset + 4]):
+                break
+        frame = None
+        offset = data.find(b"\xff", offset + 1)
+    if frame is None:
+        return None
+
+    # VBR files carry the total frame count in a Xing/Info or VBRI tag inside the first frame
+    frame_count = None
+    side_info_size = (32 if frame["channels"] == 2 else 17) if frame["version"] == 1 else \
+        (17 if frame["channels"] == 2 else 9)
+    xing_offset = offset + 4 + side_info_size
+    vbri_offset = offset + 4 + 32
+    if data[xing_offset:xing_offset + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing_offset + 4:xing_offset + 8])[0]
+        if flags & 1:
+            frame_count = struct.unpack(">I", data[xing_offset + 8:xing_offset + 12])[0]
+    elif data[vbri_offset:vbri_offset + 4] == b"VBRI":
+        frame_count = struct.unpack(">I", data[vbri_offset + 14:vbri_offset + 18])[0]
+
+    if frame_count:
+        duration_ms = frame_count * frame["samples_per_frame"] * 1000 / frame["sample_rate"]
+    else:
+        # Constant bitrate: the size of the audio data gives the duration, minus the ID3v1 tag if present
+        audio_size = file_size - audio_start - offset
+        binary_file.seek(max(0, file_size - 128))
+        if binary_file.read(3) == b"TAG":
+            audio_size -= 128
+        duration_ms = audio_size * 8 * 1000 / frame["bitrate"]
+
+    return AudioInfo(duration_ms, frame["sample_rate"], frame["channels"])
+
+
+def probe_with_ffprobe(file_path):
+    from pydub.utils import mediainfo
+
+    info = mediainfo(file_path)
+    return AudioInfo(float(info["duration"]) * 1000, int(info["sample_rate"]), int(info["channels"]))
+
+
+def probe_audio(file_path):
+    # Reads duration, sample rate and channel count from the WAV/FLAC/MP3 headers without decoding the audio,
+    # ffprobe is only used for other formats or headers that cannot be parsed
+    file_size = os.path.getsize(file_path)
+    probes = (probe_wav, probe_mp3) if file_path.lower().endswith(".mp3") else (probe_wav, probe_flac)
+    with open(file_path, "rb") as binary_file:
+        for probe in probes:
+            binary_file.seek(0)
+            try:
+                audio_info = probe(binary_file, file_size)
+            except struct.error:
+                audio_info = None
+            if audio_info:
+                return audio_info
+
+    return probe_with_ffprobe(file_path)
@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_DISTANCE = 1
+DEFAULT_PREFIX_LENGTH = 7
+DEFAULT_MIN_LENGTH = 4
+LOOKUP_CACHE_ENTRIES = 100000
+
+
+def get_edit_distance(source, target, max_distance):
+    # Damerau-Levenshtein distance (optimal string alignment), or max_distance + 1 once it is exceeded
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    previous_previous_row = None
+    previous_row = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        row = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and source[i - 1] == target[j - 2] and source[i - 2] == target[j - 1]:
+                row[j] = min(row[j], previous_previous_row[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+        previous_previous_row, previous_row = previous_row, row
+    return previous_row[-1]
+
+
+def get_deletes(word, max_distance, prefix_length):
+    # Every variant of the word's prefix with up to max_distance characters deleted
+    deletes = {word[:prefix_length]}
+    edits = {word[:prefix_length]}
+    for _ in range(max_distance):
+        edits = {edit[:index] + edit[index + 1:] for edit in edits for index in range(len(edit))}
+        deletes |= edits
+    return deletes
+
+
+class SymSpellIndex:
+    # SymSpell deletion index over the lexicon's vocabulary: the deletes of every word are precomputed,
+    # so a token is matched by looking up its own deletes instead of comparing it with every word.
+    # Only the few candidates sharing a delete are checked with the real edit distance.
+    def __init__(self, vocabulary, max_distance=DEFAULT_MAX_DISTANCE, prefix_length=DEFAULT_PREFIX_LENGTH,
+                 min_length=DEFAULT_MIN_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_length = min_length
+        self.vocabulary = set(vocabulary)
+        self.deletes = {}
+        for word in self.vocabulary:
+            if len(word) >= min_length:
+                for delete in get_deletes(word, max_distance, prefix_length):
+                    self.deletes.setdefault(delete, []).append(word)
+        self._init_lookup_cache()
+
+    def _init_lookup_cache(self):
+        self.lookup_cache = OrderedDict()
+        self.lookup_cache_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lookup_cache"], state["lookup_cache_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_lookup_cache()
+
+    def lookup(self, token):
+        # Returns (canonical word, distance) of the closest vocabulary word, or (None, None)
+        if token in self.vocabulary:
+            return token, 0
+        if len(token) < self.min_length or not self.max_distance:
+            return None, None
+
+        with self.lookup_cache_lock:
+            if token in self.lookup_cache:
+                self.lookup_cache.move_to_end(token)
+                return self.lookup_cache[token]
+
+        best_match = None, None
+        candidates = {
+            word for delete in get_deletes(token, self.max_distance, self.prefix_length)
+            for word in self.deletes.get(delete, ())
+        }
+        # Keeps the closest word, ties go to the alphabetically first one so results don't depend on set order
+        max_distance = self.max_distance
+        for word in sorted(candidates):
+            distance = get_edit_distance(token, word, max_distance)
+            if distance <= max_distance:
+                best_match = word, distance
+                # Only a strictly closer word can replace it, nothing is closer than 1
+                if distance == 1:
+                    break
+                max_distance = distance - 1
+
+        with self.lookup_cache_lock:
+            self.lookup_cache[token] = best_match
+            if len(self.lookup_cache) > LOOKUP_CACHE_ENTRIES:
+                self.lookup_cache.popitem(last=False)
+        return best_match
+
+    def get_canonical_tokens(self, tokens):
+        # Replaces every token with its closest vocabulary word, tokens without one are kept as they are
+        return [self.lookup(token)[0] or token for token in tokens]
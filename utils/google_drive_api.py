@@ -1,43 +1,124 @@
-import google
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import os
+import threading
+
+from utils.audio_preprocessing import DEFAULT_AUDIO_FORMAT, get_mime_type, prepared_audio_file
+from utils.rate_limit import rate_limited
+from utils.resumable_upload import DEFAULT_CHUNK_SIZE, ResumableDriveUpload
+
+CREDENTIALS_PATH = "google-secret.json"
+DRIVE_SCOPES = ["https://www.googleapis.com/auth/drive"]
+MAX_BATCH_REQUESTS = 100  # Limit of the Drive batch endpoint
 
 
 class GoogleDriveApi:
+    # Credentials, the Drive discovery document and the HTTP session are loaded once and reused by every
+    # upload. Each thread gets its own service object (httplib2 is not thread-safe), built from the
+    # discovery document bundled with google-api-python-client instead of fetching it.
+    _lock = threading.Lock()
+    _credentials = None
+    _discovery_document = None
+    _authorized_session = None
+    _thread_local = threading.local()
 
     @classmethod
-    def upload_audio_file_to_google_drive(cls, file_path):
-        # Get default credentials
-        creds, _ = google.auth.load_credentials_from_file("google-secret.json")
+    def get_credentials(cls):
+        import google.auth
+        from google.auth.transport.requests import Request
 
-        # Create Drive API client
-        service = build("drive", "v3", credentials=creds)
+        with cls._lock:
+            if cls._credentials is None:
+                cls._credentials, _ = google.auth.load_credentials_from_file(CREDENTIALS_PATH, scopes=DRIVE_SCOPES)
+            if not cls._credentials.valid:
+                cls._credentials.refresh(Request())
+            return cls._credentials
 
-        # Extract file name and MIME type
-        file_name = file_path.split("/")[-1]
-        mime_type = "audio/wav" if file_path.endswith(".wav") else "audio/mpeg"
+    @classmethod
+    def get_authorized_session(cls):
+        from google.auth.transport.requests import AuthorizedSession
 
-        # Prepare file metadata
-        file_metadata = {"name": file_name}
+        credentials = cls.get_credentials()
+        with cls._lock:
+            if cls._authorized_session is None:
+                cls._authorized_session = AuthorizedSession(credentials)
+            return cls._authorized_session
 
-        # Upload the file
-        media = MediaFileUpload(file_path, mimetype=mime_type)
-        uploaded_file = (
-            service.files()
-            .create(body=file_metadata, media_body=media, fields="id")
-            .execute()
-        )
+    @classmethod
+    def get_discovery_document(cls):
+        with cls._lock:
+            if cls._discovery_document is None:
+                from googleapiclient.discovery_cache import get_static_doc
 
-        file_id = uploaded_file.get("id")
-        print(f"File ID: {file_id}")
+                cls._discovery_document = get_static_doc("drive", "v3")
+            return cls._discovery_document
 
-        # Make the file publicly accessible
-        service.permissions().create(
-            fileId=file_id, body={"role": "reader", "type": "anyone"}
-        ).execute()
+    @classmethod
+    def get_service(cls):
+        credentials = cls.get_credentials()
+        service = getattr(cls._thread_local, "service", None)
+        if service is None:
+            from googleapiclient.discovery import build_from_document
 
-        # Get the public URL
-        public_url = f"https://drive.google.com/uc?id={file_id}&export=download"
-        print(f"File uploaded successfully: {public_url}")
+            service = build_from_document(cls.get_discovery_document(), credentials=credentials)
+            cls._thread_local.service = service
+        return service
 
-        return public_url
+    @classmethod
+    @rate_limited("google_drive")
+    def _create_public_permissions(cls, file_ids):
+        service = cls.get_service()
+        errors = []
+
+        def on_permission_created(request_id, response, exception):
+            if exception is not None:
+                errors.append(exception)
+
+        batch = service.new_batch_http_request(callback=on_permission_created)
+        for file_id in file_ids:
+            batch.add(
+                service.permissions().create(fileId=file_id, body={"role": "reader", "type": "anyone"}),
+                request_id=file_id,
+            )
+        batch.execute()
+
+        # A throttled request makes the whole batch retry, granting the same permission twice is harmless
+        if errors:
+            raise errors[0]
+
+    @classmethod
+    def make_files_public(cls, file_ids):
+        # Grants "anyone with the link" access to many files through the batch endpoint
+        for start in range(0, len(file_ids), MAX_BATCH_REQUESTS):
+            cls._create_public_permissions(file_ids[start:start + MAX_BATCH_REQUESTS])
+
+    @classmethod
+    def upload_audio_files_to_google_drive(cls, file_paths, audio_format=DEFAULT_AUDIO_FORMAT,
+                                           chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None):
+        authorized_session = cls.get_authorized_session()
+        resumable_upload = ResumableDriveUpload(authorized_session, chunk_size, progress_callback=progress_callback)
+
+        file_ids = []
+        for file_path in file_paths:
+            with prepared_audio_file(file_path, audio_format) as prepared_file_path:
+                # Extract file name and MIME type of the 16 kHz mono copy
+                extension = os.path.splitext(prepared_file_path)[1]
+                file_name = os.path.splitext(os.path.basename(file_path))[0] + extension
+                mime_type = get_mime_type(prepared_file_path)
+
+                # Prepare file metadata
+                file_metadata = {"name": file_name}
+
+                # Upload the file in resumable chunks
+                uploaded_file = resumable_upload.upload(prepared_file_path, file_metadata, mime_type)
+
+            file_ids.append(uploaded_file.get("id"))
+
+        # Make the files publicly accessible
+        cls.make_files_public(file_ids)
+
+        # Get the public URLs
+        return [f"https://drive.google.com/uc?id={file_id}&export=download" for file_id in file_ids]
+
+    @classmethod
+    def upload_audio_file_to_google_drive(cls, file_path, audio_format=DEFAULT_AUDIO_FORMAT,
+                                          chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None):
+        return cls.upload_audio_files_to_google_drive([file_path], audio_format, chunk_size, progress_callback)[0]
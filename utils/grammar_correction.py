@@ -0,0 +1,97 @@
+import difflib
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.nlp_cloud_api import LLAMA_MODEL, NLPCloudApi
+from utils.result_cache import ResultCache, get_result_cache, hash_text
+from utils.text_segmentation import estimate_tokens, split_sentence_spans, split_sentences
+
+# Estimated tokens per correction request, small batches keep every request fast
+DEFAULT_BATCH_TOKENS = 400
+DEFAULT_BATCH_WORKERS = 8
+# Sentences without any letter (numbers, punctuation) have nothing to correct
+LETTER_PATTERN = re.compile(r"[^\W\d_]")
+# A corrected sentence less similar than this to its source is taken as misaligned
+MIN_ALIGNMENT_RATIO = 0.5
+
+
+def get_sentence_cache_key(sentence):
+    return ResultCache.build_key("NLPCloudApi", "gs_correction_sentence", LLAMA_MODEL, None, hash_text(sentence))
+
+
+def is_aligned(source_sentences, corrected_sentences):
+    # The correction kept the sentences one to one, so each corrected sentence belongs to its source
+    return len(corrected_sentences) == len(source_sentences) and all(
+        difflib.SequenceMatcher(None, source, corrected).ratio() >= MIN_ALIGNMENT_RATIO
+        for source, corrected in zip(source_sentences, corrected_sentences)
+    )
+
+
+def get_correction_batches(pending_indexes, sentences, batch_tokens):
+    # Consecutive sentences still to correct, packed up to batch_tokens; a skipped sentence ends a batch
+    batches = []
+    batch, batch_size, previous_index = [], 0, None
+    for index in pending_indexes:
+        sentence_size = estimate_tokens(sentences[index])
+        if batch and (index != previous_index + 1 or batch_size + sentence_size > batch_tokens):
+            batches.append(batch)
+            batch, batch_size = [], 0
+        batch.append(index)
+        batch_size += sentence_size
+        previous_index = index
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def correct_long_text(text, batch_tokens=DEFAULT_BATCH_TOKENS, workers=DEFAULT_BATCH_WORKERS):
+    # The text is split at sentence boundaries, sentences without letters or whose correction is already
+    # cached are skipped and the rest is corrected in small batches concurrently (under the shared NLP Cloud
+    # rate limit), then everything is put back in order with the original spacing and newlines.
+    # Latency follows the largest batch, not the text.
+    spans = split_sentence_spans(text, batch_tokens, estimate_tokens)
+    sentences = [sentence for sentence, _ in spans]
+    separators = [separator for _, separator in spans]
+    corrected_sentences = [None] * len(sentences)
+    result_cache = get_result_cache()
+
+    pending_indexes = []
+    for index, sentence in enumerate(sentences):
+        if not LETTER_PATTERN.search(sentence):
+            corrected_sentences[index] = sentence
+            continue
+        if result_cache is not None:
+            found, corrected_sentence = result_cache.get(get_sentence_cache_key(sentence))
+            if found:
+                corrected_sentences[index] = corrected_sentence
+                continue
+        pending_indexes.append(index)
+
+    batches = get_correction_batches(pending_indexes, sentences, batch_tokens)
+    batch_texts = ["".join(sentences[index] + separators[index] for index in batch).rstrip() for batch in batches]
+    if batch_texts:
+        with ThreadPoolExecutor(max_workers=min(workers, len(batch_texts))) as executor:
+            corrected_batches = list(executor.map(NLPCloudApi.correct_grammar_from_text, batch_texts))
+    else:
+        corrected_batches = []
+
+    merged_indexes = set()
+    for batch, corrected_batch in zip(batches, corrected_batches):
+        corrected_batch_sentences = split_sentences(corrected_batch)
+        if not is_aligned([sentences[index] for index in batch], corrected_batch_sentences):
+            # Sentences were merged, split or moved by the correction: the batch stays one piece, ending
+            # with the batch's last separator, and is only cached as a whole by correct_grammar_from_text
+            corrected_sentences[batch[0]] = corrected_batch.strip()
+            separators[batch[0]] = separators[batch[-1]]
+            merged_indexes.update(batch[1:])
+            continue
+
+        for index, corrected_sentence in zip(batch, corrected_batch_sentences):
+            corrected_sentences[index] = corrected_sentence
+            if result_cache is not None:
+                result_cache.set(get_sentence_cache_key(sentences[index]), corrected_sentence)
+
+    return "".join(
+        corrected_sentences[index] + separators[index]
+        for index in range(len(sentences)) if index not in merged_indexes
+    ).rstrip()
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import deque
+
+from utils.arabic_normalization import fold_text, fold_tokens
+from utils.fuzzy_matching import SymSpellIndex
+from utils.result_cache import get_user_cache_directory
+
+DEFAULT_LEXICON_PATH = "detection_lexicon.txt"
+DEFAULT_AUTOMATON_DIRECTORY = get_user_cache_directory()
+AUTOMATON_VERSION = 2  # Bumped when the pickled layout changes, so old caches are rebuilt
+DEFAULT_MAX_EDIT_DISTANCE = 0  # Exact matching unless DETECTION_MAX_EDIT_DISTANCE is set
+
+
+def read_lexicon(lexicon_path):
+    # One keyword or phrase of lemmas per line, blank lines and lines starting with "#" are ignored
+    with open(lexicon_path, encoding="utf-8") as lexicon_file:
+        terms = [line.strip() for line in lexicon_file]
+    return [term for term in terms if term and not term.startswith("#")]
+
+
+class KeywordAutomaton:
+    # Aho-Corasick automaton over lemma sequences: every term (a single lemma or a phrase of several)
+    # is found in one pass over the transcript's lemmas, whatever the size of the lexicon.
+    # Terms are matched by their folded form and reported as written in the lexicon.
+    def __init__(self, terms):
+        self.terms = []
+        self.term_lengths = []
+        self.transitions = [{}]
+        self.state_terms = [-1]
+        self.fail = [0]
+        self.output_links = [0]
+
+        for term in terms:
+            self._add_term(term)
+        self._build_links()
+
+    def _add_term(self, term):
+        tokens = fold_text(term).split()
+        if not tokens:
+            return
+
+        state = 0
+        for token in tokens:
+            next_state = self.transitions[state].get(token)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.state_terms.append(-1)
+                self.transitions[state][token] = next_state
+            state = next_state
+
+        if self.state_terms[state] == -1:
+            self.state_terms[state] = len(self.terms)
+            self.terms.append(term)
+            self.term_lengths.append(len(tokens))
+
+    def _build_links(self):
+        # Breadth first, so the failure state of every state is built before its children.
+        # output_links skip the failure states that don't end a term.
+        self.fail = [0] * len(self.transitions)
+        self.output_links = [0] * len(self.transitions)
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self.transitions[state].items():
+                fail_state = self.fail[state]
+                while fail_state and token not in self.transitions[fail_state]:
+                    fail_state = self.fail[fail_state]
+                fail_state = self.transitions[fail_state].get(token, 0)
+                self.fail[next_state] = fail_state
+                self.output_links[next_state] = (
+                    fail_state if self.state_terms[fail_state] != -1 else self.output_links[fail_state]
+                )
+                queue.append(next_state)
+
+    def get_vocabulary(self):
+        return {token for transitions in self.transitions for token in transitions}
+
+    def find_matches(self, tokens):
+        # Yields (term, start, end) for every occurrence, end is exclusive
+        state = 0
+        for index, token in enumerate(tokens):
+            while state and token not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(token, 0)
+
+            match_state = state if self.state_terms[state] != -1 else self.output_links[state]
+            while match_state:
+                term_index = self.state_terms[match_state]
+                yield self.terms[term_index], index + 1 - self.term_lengths[term_index], index + 1
+                match_state = self.output_links[match_state]
+
+    def detect(self, tokens):
+        # {term: {"count": n, "positions": [[start, end], ...]}} of every term found in the folded lemmas
+        detected_terms = {}
+        for term, start, end in self.find_matches(tokens):
+            detected_term = detected_terms.setdefault(term, {"count": 0, "positions": []})
+            detected_term["count"] += 1
+            detected_term["positions"].append([start, end])
+        return detected_terms
+
+
+def _load_compiled(lexicon_path, name, compile_lexicon, automaton_directory):
+    # Compiled structures are pickled next to the other caches, keyed by the lexicon's hash,
+    # so a large lexicon is only compiled again after it changes
+    with open(lexicon_path, "rb") as lexicon_file:
+        lexicon_hash = hashlib.sha256(lexicon_file.read()).hexdigest()
+    compiled_path = os.path.join(automaton_directory, f"{name}_v{AUTOMATON_VERSION}_{lexicon_hash[:16]}.pickle")
+
+    if os.path.exists(compiled_path):
+        with open(compiled_path, "rb") as compiled_file:
+            return pickle.load(compiled_file)
+
+    compiled = compile_lexicon()
+    os.makedirs(automaton_directory, exist_ok=True)
+    temporary_path = compiled_path + ".tmp"
+    with open(temporary_path, "wb") as compiled_file:
+        pickle.dump(compiled, compiled_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, compiled_path)
+    return compiled
+
+
+def load_keyword_automaton(lexicon_path, automaton_directory=DEFAULT_AUTOMATON_DIRECTORY):
+    return _load_compiled(lexicon_path, "keyword_automaton",
+                          lambda: KeywordAutomaton(read_lexicon(lexicon_path)), automaton_directory)
+
+
+def load_fuzzy_index(lexicon_path, automaton, max_distance, automaton_directory=DEFAULT_AUTOMATON_DIRECTORY):
+    return _load_compiled(lexicon_path, f"fuzzy_index_d{max_distance}",
+                          lambda: SymSpellIndex(automaton.get_vocabulary(), max_distance), automaton_directory)
+
+
+_keyword_automaton = None
+_fuzzy_index = None
+_keyword_automaton_lock = threading.Lock()
+
+
+def get_keyword_automaton():
+    # Shared automaton of the lexicon at DETECTION_LEXICON_PATH, empty when there is no lexicon file.
+    # With DETECTION_MAX_EDIT_DISTANCE > 0 a fuzzy index over the lexicon's words is loaded along with it.
+    global _keyword_automaton, _fuzzy_index
+    with _keyword_automaton_lock:
+        if _keyword_automaton is None:
+            lexicon_path = os.getenv("DETECTION_LEXICON_PATH", DEFAULT_LEXICON_PATH)
+            max_distance = int(os.getenv("DETECTION_MAX_EDIT_DISTANCE", DEFAULT_MAX_EDIT_DISTANCE))
+            if os.path.exists(lexicon_path):
+                _keyword_automaton = load_keyword_automaton(lexicon_path)
+                if max_distance > 0:
+                    _fuzzy_index = load_fuzzy_index(lexicon_path, _keyword_automaton, max_distance)
+            else:
+                _keyword_automaton = KeywordAutomaton([])
+        return _keyword_automaton
+
+
+def detect_keywords(lemmas):
+    # Misspelled or dialect variants of lexicon words are mapped to the canonical word before matching,
+    # the lemmas of such fuzzy matches are listed as "variants" of the term
+    keyword_automaton = get_keyword_automaton()
+    keys = fold_tokens(lemmas)
+    if _fuzzy_index is None:
+        return keyword_automaton.detect(keys)
+
+    canonical_keys = _fuzzy_index.get_canonical_tokens(keys)
+    detected_terms = keyword_automaton.detect(canonical_keys)
+    for detected_term in detected_terms.values():
+        for start, end in detected_term["positions"]:
+            if keys[start:end] != canonical_keys[start:end]:
+                variant = " ".join(lemmas[start:end])
+                variants = detected_term.setdefault("variants", [])
+                if variant not in variants:
+                    variants.append(variant)
+    return detected_terms
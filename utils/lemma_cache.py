@@ -0,0 +1,95 @@
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 200000
+SAVE_INTERVAL = 1000  # New entries between two saves of a persistent cache
+
+
+class LemmaCache:
+    # Bounded LRU cache from surface token to stripped lemma. SinaTools analyzes every token on its own,
+    # so a token seen in any earlier transcript never has to be analyzed again. With a path the cache is
+    # loaded at start and saved every SAVE_INTERVAL new entries.
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.unsaved_entries = 0
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as cache_file:
+                self.entries.update(json.load(cache_file))
+
+    def get_many(self, tokens):
+        # Returns the cached lemmas of the given tokens, counting every token as a hit or a miss
+        found = {}
+        with self.lock:
+            for token in tokens:
+                if token in self.entries:
+                    self.entries.move_to_end(token)
+                    found[token] = self.entries[token]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return found
+
+    def set_many(self, lemmas):
+        with self.lock:
+            for token, lemma in lemmas.items():
+                self.entries[token] = lemma
+                self.entries.move_to_end(token)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+            self.unsaved_entries += len(lemmas)
+            if self.path and self.unsaved_entries >= SAVE_INTERVAL:
+                self._save()
+
+    def save(self):
+        with self.lock:
+            if self.path and self.unsaved_entries:
+                self._save()
+
+    def _save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as cache_file:
+            json.dump(self.entries, cache_file, ensure_ascii=False)
+        os.replace(temporary_path, self.path)
+        self.unsaved_entries = 0
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "hit_rate": self.hits / lookups if lookups else 0,
+            }
+
+
+_lemma_cache = None
+_lemma_cache_lock = threading.Lock()
+
+
+def get_lemma_cache():
+    # Shared cache, configured with LEMMA_CACHE_MAX_ENTRIES / LEMMA_CACHE_PATH (persistent when set),
+    # or None when LEMMA_CACHE_DISABLED is set
+    global _lemma_cache
+    if os.getenv("LEMMA_CACHE_DISABLED"):
+        return None
+
+    with _lemma_cache_lock:
+        if _lemma_cache is None:
+            _lemma_cache = LemmaCache(
+                int(os.getenv("LEMMA_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                os.getenv("LEMMA_CACHE_PATH"),
+            )
+            atexit.register(_lemma_cache.save)
+        return _lemma_cache
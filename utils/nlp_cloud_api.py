@@ -1,35 +1,115 @@
-import base64
 import os
+import threading
+from contextlib import contextmanager
 
-import nlpcloud
+import requests
+from requests.adapters import HTTPAdapter
 
-finetuned_llama_client = nlpcloud.Client("finetuned-llama-3-70b", os.getenv("NLPCLOUD_TOKEN"),
-                                         gpu=True)  # Using fine-tuned-llma-3-70b because it supports arabic
-whisper_client = nlpcloud.Client("whisper", os.getenv("NLPCLOUD_TOKEN"), True)
+from utils.rate_limit import rate_limited
+from utils.result_cache import cached_result
+from utils.utils import Base64JsonBody
+
+WHISPER_ASR_URL = "https://api.nlpcloud.io/v1/gpu/whisper/asr"
+WHISPER_ASR_TIMEOUT = (10, 600)  # (connect, read) seconds
+
+LLAMA_MODEL = "finetuned-llama-3-70b"  # Using fine-tuned-llma-3-70b because it supports arabic
+WHISPER_MODEL = "whisper"
+# Requests in flight at once per model, calls beyond that wait for a free slot
+DEFAULT_POOL_SIZES = {LLAMA_MODEL: 4, WHISPER_MODEL: 2}
 
 
 class NLPCloudApi:
+    # Model clients are created on first use, after the entry point has loaded NLPCLOUD_TOKEN, and then
+    # shared by every file and thread. Each model has its own pool of pool_sizes[model] request slots.
+    pool_sizes = dict(DEFAULT_POOL_SIZES)
+    _clients = {}
+    _client_slots = {}
+    _sessions = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, pool_sizes):
+        with cls._lock:
+            cls.pool_sizes.update(pool_sizes)
+            for model in pool_sizes:
+                cls._clients.pop(model, None)
+                cls._client_slots.pop(model, None)
+                session = cls._sessions.pop(model, None)
+                if session is not None:
+                    session.close()
+
+    @classmethod
+    def _get_client_slots(cls, model):
+        # Called with cls._lock held
+        if model not in cls._client_slots:
+            cls._client_slots[model] = threading.BoundedSemaphore(cls.pool_sizes.get(model, 1))
+        return cls._client_slots[model]
+
+    @classmethod
+    def get_client(cls, model):
+        with cls._lock:
+            if model not in cls._clients:
+                import nlpcloud
+
+                cls._clients[model] = nlpcloud.Client(model, os.getenv("NLPCLOUD_TOKEN"), gpu=True)
+            return cls._clients[model], cls._get_client_slots(model)
+
+    @classmethod
+    def get_session(cls, model):
+        # Keep-alive session for the requests sent without the nlpcloud client
+        with cls._lock:
+            if model not in cls._sessions:
+                session = requests.Session()
+                pool_size = cls.pool_sizes.get(model, 1)
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True))
+                session.headers.update({
+                    "Authorization": f"Token {os.getenv('NLPCLOUD_TOKEN')}",
+                    "User-Agent": "nlpcloud-python-client",
+                    "Content-Type": "application/json",
+                })
+                cls._sessions[model] = session
+            return cls._sessions[model], cls._get_client_slots(model)
+
+    @classmethod
+    @contextmanager
+    def client(cls, model):
+        nlpcloud_client, client_slots = cls.get_client(model)
+        with client_slots:
+            yield nlpcloud_client
+
     @classmethod
+    @cached_result("generation", LLAMA_MODEL)
+    @rate_limited("nlpcloud", LLAMA_MODEL)
     def generate_analysis_for_conversation(cls, conversation_text):
-        result = finetuned_llama_client.generation(conversation_text, max_length=8000)
+        with cls.client(LLAMA_MODEL) as llama_client:
+            result = llama_client.generation(conversation_text, max_length=8000)
         return result['generated_text']
 
     @classmethod
+    @cached_result("asr", WHISPER_MODEL, language="ar", content="file")
+    @rate_limited("nlpcloud", WHISPER_MODEL)
     def generate_speech_to_text_from_local_file(cls, file_path, ):
-        with open(file_path, 'rb') as binary_file:
-            binary_file_data = binary_file.read()
-            base64_encoded_data = base64.b64encode(binary_file_data)
-            base64_output = base64_encoded_data.decode('utf-8')
+        # Same request as the nlpcloud client's asr(encoded_file=...), but the base64 body is streamed from disk
+        session, client_slots = cls.get_session(WHISPER_MODEL)
+        with client_slots, Base64JsonBody(file_path, "encoded_file", {"input_language": "ar"}) as body:
+            response = session.post(WHISPER_ASR_URL, data=body, timeout=WHISPER_ASR_TIMEOUT)
+        response.raise_for_status()
 
-            asr_result = whisper_client.asr(encoded_file=base64_output, input_language='ar')
-            return asr_result["text"]
+        asr_result = response.json()
+        return asr_result["text"]
 
     @classmethod
+    @cached_result("gs_correction", LLAMA_MODEL)
+    @rate_limited("nlpcloud", LLAMA_MODEL)
     def correct_grammar_from_text(cls, text):
-        grammar_correction_result = finetuned_llama_client.gs_correction(text=text)
+        with cls.client(LLAMA_MODEL) as llama_client:
+            grammar_correction_result = llama_client.gs_correction(text=text)
         return grammar_correction_result['correction']
 
     @classmethod
-    def generate_summary_from_text(clscls, text):
-        summary_result = finetuned_llama_client.summarization(text=text)
+    @cached_result("summarization", LLAMA_MODEL)
+    @rate_limited("nlpcloud", LLAMA_MODEL)
+    def generate_summary_from_text(cls, text):
+        with cls.client(LLAMA_MODEL) as llama_client:
+            summary_result = llama_client.summarization(text=text)
         return summary_result["summary_text"]
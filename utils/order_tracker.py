@@ -0,0 +1,248 @@
+import asyncio
+import functools
+import heapq
+import json
+import os
+import random
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from utils.result_cache import get_user_cache_directory
+from utils.transkriptor_api import OrderStillProcessingError, TranskriptorApi
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# Shared by every program whatever directory it is started from
+DEFAULT_STATE_PATH = os.path.join(get_user_cache_directory(), "pending_orders.json")
+STATE_SAVE_INTERVAL = 1
+
+TrackedOrder = namedtuple("TrackedOrder", ["order_id", "metadata", "transcript", "order_status", "error"])
+
+
+@contextmanager
+def locked_state_file(state_path):
+    # Exclusive lock on a file next to the state, held by every process sharing it (e.g. the Google Drive
+    # GUI and the webhook receiver) while it reads or rewrites the state
+    if os.path.dirname(state_path):
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(state_path + ".lock", "a+b") as lock_file:
+        if os.name == "nt":
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_state(state_path):
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, encoding="utf-8") as state_file:
+        return json.load(state_file)
+
+
+class OrderTracker:
+    # Polls many Transkriptor orders on an asyncio loop and yields them as they complete.
+    # Every order is polled again after an exponentially growing, jittered delay, all polls share
+    # one rate-limited schedule and the pending orders are saved to state_path, so a restarted
+    # tracker resumes them without uploading anything again. Several processes can share the state file:
+    # each one only writes the orders it added or resolved since its last save.
+    def __init__(self, state_path=DEFAULT_STATE_PATH, concurrency=10, requests_per_second=5,
+                 initial_delay=5, max_delay=300, backoff_factor=2, jitter=0.25, max_errors=5,
+                 fetch_order_status=TranskriptorApi.get_order_status):
+        self.state_path = state_path
+        self.concurrency = concurrency
+        self.request_interval = 1 / requests_per_second
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.max_errors = max_errors
+        self.fetch_order_status = fetch_order_status
+
+        self.pending = {}
+        self.added_orders = {}
+        self.resolved_orders = set()
+        self.schedule = []
+        self.next_request_time = 0
+        self.state_changed = False
+        self.last_saved_time = 0
+        self.results = None
+        self.wakeup = None
+        self.poll_error = None
+        self.load_state()
+
+    def load_state(self):
+        if not self.state_path:
+            return
+
+        with locked_state_file(self.state_path):
+            pending_orders = read_state(self.state_path)
+        for order_id, metadata in pending_orders.items():
+            self.add_order(order_id, metadata, save=False, delay=0)
+        self.added_orders.clear()
+
+    def save_state(self):
+        # Merges this tracker's changes into the state on disk, which other processes may have changed
+        if not self.state_path:
+            return
+
+        with locked_state_file(self.state_path):
+            pending_orders = read_state(self.state_path)
+            pending_orders.update(self.added_orders)
+            for order_id in self.resolved_orders:
+                pending_orders.pop(order_id, None)
+
+            temporary_path = self.state_path + ".tmp"
+            with open(temporary_path, "w", encoding="utf-8") as state_file:
+                json.dump(pending_orders, state_file, ensure_ascii=False)
+            os.replace(temporary_path, self.state_path)
+
+        self.added_orders.clear()
+        self.resolved_orders.clear()
+        self.state_changed = False
+        self.last_saved_time = time.monotonic()
+
+    def add_order(self, order_id, metadata=None, save=True, delay=None):
+        order_id = str(order_id)
+        if order_id in self.pending:
+            return
+
+        self.pending[order_id] = {"metadata": metadata or {}, "delay": self.initial_delay, "errors": 0}
+        self.added_orders[order_id] = metadata or {}
+        self.resolved_orders.discard(order_id)
+        self._schedule_poll(order_id, self.initial_delay if delay is None else delay)
+        if save:
+            self.save_state()
+
+    def resolve_order(self, order_id, order_status=None, error=None):
+        # Completes an order without polling it, e.g. when its webhook arrives first
+        order_id = str(order_id)
+        if order_id not in self.pending:
+            return False
+
+        # Completed orders are saved in batches, at worst they are polled once more after a restart
+        order = self.pending.pop(order_id)
+        self.added_orders.pop(order_id, None)
+        self.resolved_orders.add(order_id)
+        self.state_changed = True
+        transcript = TranskriptorApi.get_transcript_text(order_status) if order_status is not None else None
+        tracked_order = TrackedOrder(order_id, order["metadata"], transcript, order_status, error)
+        if self.results is not None:
+            self.results.put_nowait(tracked_order)
+        return True
+
+    def _schedule_poll(self, order_id, delay):
+        heapq.heappush(self.schedule, (time.monotonic() + delay, order_id))
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def _reschedule(self, order_id):
+        order = self.pending[order_id]
+        delay = order["delay"] * random.uniform(1 - self.jitter, 1 + self.jitter)
+        order["delay"] = min(self.max_delay, order["delay"] * self.backoff_factor)
+        self._schedule_poll(order_id, delay)
+
+    async def _wait_for_rate_limit(self):
+        now = time.monotonic()
+        request_time = max(now, self.next_request_time)
+        self.next_request_time = request_time + self.request_interval
+        if request_time > now:
+            await asyncio.sleep(request_time - now)
+
+    async def _poll(self, order_id, semaphore):
+        try:
+            order_status = await asyncio.to_thread(self.fetch_order_status, order_id)
+        except OrderStillProcessingError:
+            if order_id in self.pending:
+                self._reschedule(order_id)
+        except Exception as e:
+            if order_id in self.pending:
+                self.pending[order_id]["errors"] += 1
+                if self.pending[order_id]["errors"] >= self.max_errors:
+                    self.resolve_order(order_id, error=e)
+                else:
+                    self._reschedule(order_id)
+        else:
+            self.resolve_order(order_id, order_status)
+        finally:
+            semaphore.release()
+
+    def _poll_done(self, polls, poll):
+        # A poll that failed outside of fetching (e.g. on a malformed order) stops the scheduler
+        polls.discard(poll)
+        if not poll.cancelled() and poll.exception() is not None and self.poll_error is None:
+            self.poll_error = poll.exception()
+            self.wakeup.set()
+
+    async def _run_schedule(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        polls = set()
+        while True:
+            if self.poll_error is not None:
+                raise self.poll_error
+
+            while self.schedule and self.schedule[0][0] <= time.monotonic():
+                _, order_id = heapq.heappop(self.schedule)
+                if order_id not in self.pending:
+                    continue
+                await semaphore.acquire()
+                await self._wait_for_rate_limit()
+                poll = asyncio.create_task(self._poll(order_id, semaphore))
+                polls.add(poll)
+                poll.add_done_callback(functools.partial(self._poll_done, polls))
+
+            if self.state_changed and time.monotonic() - self.last_saved_time >= STATE_SAVE_INTERVAL:
+                self.save_state()
+
+            self.wakeup.clear()
+            timeout = self.schedule[0][0] - time.monotonic() if self.schedule else STATE_SAVE_INTERVAL
+            if self.state_changed:
+                timeout = min(timeout, STATE_SAVE_INTERVAL)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def completed(self):
+        # Yields a TrackedOrder for every pending order as soon as it completes or fails. If the scheduler
+        # fails (a poll or a state save raised), the orders completed so far are yielded and then its error.
+        self.results = asyncio.Queue()
+        self.wakeup = asyncio.Event()
+        self.poll_error = None
+        scheduler = asyncio.create_task(self._run_schedule())
+        try:
+            while self.pending or not self.results.empty():
+                next_result = asyncio.ensure_future(self.results.get())
+                done, _ = await asyncio.wait([next_result, scheduler], return_when=asyncio.FIRST_COMPLETED)
+                if next_result not in done:
+                    next_result.cancel()
+                    # The scheduler never returns, it only stops by raising
+                    scheduler.result()
+                yield next_result.result()
+        finally:
+            scheduler.cancel()
+            # Orders that completed but were never yielded stay pending for the next run
+            while not self.results.empty():
+                tracked_order = self.results.get_nowait()
+                self.pending[tracked_order.order_id] = {
+                    "metadata": tracked_order.metadata, "delay": self.initial_delay, "errors": 0,
+                }
+                self.added_orders[tracked_order.order_id] = tracked_order.metadata
+                self.resolved_orders.discard(tracked_order.order_id)
+                self.state_changed = True
+            if self.state_changed:
+                self.save_state()
+            self.results = None
+            self.wakeup = None
@@ -0,0 +1,133 @@
+import importlib
+from functools import partial
+
+from utils.audio_preprocessing import DEFAULT_AUDIO_FORMAT, prepared_audio_file
+from utils.arabic_normalization import normalize_text
+from utils.asr_backends import get_asr_backend
+from utils.audio_chunking import DEFAULT_CHUNK_WORKERS, transcribe_long_audio
+from utils.grammar_correction import correct_long_text
+from utils.keyword_detection import detect_keywords, get_keyword_automaton
+from utils.sina_tools_api import SinaToolsApi
+from utils.staged_pipeline import PipelineStage, StagedPipeline
+from utils.summarization import summarize_long_text
+from utils.utils import get_audio_duration, save_result_to_local_file
+
+
+class SpeechToTextPipeline:
+    # ASR -> grammar correction -> summary -> lemmatization -> word detection,
+    # shared by the GUI (program.py) and the batch CLI (program_batch.py).
+    # Every stage reads and updates the same result_data dict.
+    @classmethod
+    def warm_up(cls):
+        # Imports the heavy modules ahead of the first file, e.g. from a background thread once the GUI is shown.
+        # Only the import itself is wanted: the modules land in sys.modules, where the stages' own lazy
+        # imports find them.
+        for module_name in ("nlpcloud", "pydub"):
+            importlib.import_module(module_name)
+
+        SinaToolsApi.warm_up()
+        get_keyword_automaton()
+
+    @classmethod
+    def check_duration(cls, result_data, max_duration):
+        duration_of_sound_file = get_audio_duration(result_data["file_path"])
+        if duration_of_sound_file > max_duration:
+            raise ValueError(f"File must be less than {max_duration} seconds.")
+
+    @classmethod
+    def transcribe(cls, result_data, asr_backend="nlpcloud", asr_options=None, use_vad=False,
+                   audio_format=DEFAULT_AUDIO_FORMAT):
+        # Speech-to-text process on a 16 kHz mono copy, long recordings are transcribed in parallel chunks
+        asr_options = dict(asr_options or {})
+        asr_options.setdefault("workers", DEFAULT_CHUNK_WORKERS)
+        backend = get_asr_backend(asr_backend, **asr_options)
+        with prepared_audio_file(result_data["file_path"], audio_format) as prepared_file_path:
+            result_data["full_text"] = transcribe_long_audio(prepared_file_path, backend, use_vad=use_vad,
+                                                             audio_format=audio_format)
+
+    @classmethod
+    def correct_grammar(cls, result_data):
+        # Sentence batches are corrected concurrently and put back in order
+        result_data["full_text"] = correct_long_text(result_data["full_text"])
+
+    @classmethod
+    def summarize(cls, result_data):
+        # Long transcripts are summarized by section and the section summaries reduced into one
+        result_data["summary"] = summarize_long_text(result_data["full_text"])
+
+    @classmethod
+    def analyze_morphology(cls, result_data):
+        # Morphological analysis
+        lemmas = SinaToolsApi.get_lemmas(normalize_text(result_data["full_text"]))
+        result_data["lemmas"] = lemmas
+
+        # Detect the lexicon's keywords and phrases, with their positions in the lemmas
+        result_data["detected_words"] = detect_keywords(lemmas)
+
+    @classmethod
+    def get_text_stages(cls, correction_workers=1, summary_workers=1, morphology_workers=1):
+        # Stages after ASR, for transcripts that come from elsewhere (e.g. Transkriptor webhooks)
+        return [
+            PipelineStage("correction", cls.correct_grammar, correction_workers),
+            PipelineStage("summary", cls.summarize, summary_workers),
+            PipelineStage("morphology", cls.analyze_morphology, morphology_workers),
+        ]
+
+    @classmethod
+    def get_stages(cls, asr_workers=1, correction_workers=1, summary_workers=1, morphology_workers=1,
+                   asr_backend="nlpcloud", asr_options=None, use_vad=False, audio_format=DEFAULT_AUDIO_FORMAT,
+                   max_duration=None):
+        stages = []
+        if max_duration:
+            stages.append(PipelineStage("admission", partial(cls.check_duration, max_duration=max_duration),
+                                         asr_workers))
+
+        return stages + [
+            PipelineStage(
+                "asr",
+                partial(cls.transcribe, asr_backend=asr_backend, asr_options=asr_options, use_vad=use_vad,
+                        audio_format=audio_format),
+                asr_workers,
+            ),
+        ] + cls.get_text_stages(correction_workers, summary_workers, morphology_workers)
+
+    @staticmethod
+    def get_result(result_data):
+        return {
+            "full_text": result_data.get("full_text"),
+            "summary": result_data.get("summary"),
+            "lemmas": result_data.get("lemmas"),
+            "detected_words": result_data.get("detected_words"),
+        }
+
+    @classmethod
+    def process_file(cls, file_path):
+        result_data = {"file_path": file_path}
+        for stage in cls.get_stages():
+            stage.handler(result_data)
+
+        return cls.get_result(result_data)
+
+    @classmethod
+    def process_text(cls, text):
+        result_data = {"full_text": text}
+        for stage in cls.get_text_stages():
+            stage.handler(result_data)
+
+        return cls.get_result(result_data)
+
+    @classmethod
+    def process_file_to_local_file(cls, file_path, result_path):
+        result_data = cls.process_file(file_path)
+        save_result_to_local_file(result_path, result_data)
+        return result_data
+
+    @classmethod
+    def process_files(cls, file_paths, queue_size=4, **stage_workers):
+        # Yields (file_path, result, error) as files leave the last stage, not in input order
+        pipeline = StagedPipeline(cls.get_stages(**stage_workers), queue_size=queue_size)
+        for job in pipeline.run(file_paths, build_data=lambda file_path: {"file_path": file_path}):
+            if job.error is not None:
+                yield job.item, None, job.error
+            else:
+                yield job.item, cls.get_result(job.data), None
@@ -0,0 +1,161 @@
+import email.utils
+import functools
+import os
+import random
+import re
+import threading
+import time
+
+import requests
+
+# (requests per second, burst) per provider, overridden with RATE_LIMIT_<PROVIDER>=<rate>[,<burst>]
+DEFAULT_RATE_LIMITS = {
+    "nlpcloud": (2, 4),
+    "transkriptor": (5, 10),
+    "google_drive": (10, 20),
+}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_RETRIES = 5
+DEFAULT_BASE_DELAY = 1
+DEFAULT_MAX_DELAY = 60
+
+
+class TokenBucket:
+    # Thread-safe token bucket: refills `rate` tokens per second up to `capacity`, callers block until
+    # a token is free. A throttled response pauses the whole bucket, so every thread backs off at once.
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_time = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_time) * self.rate)
+                self.updated_time = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait_time)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limit(provider):
+    setting = os.getenv(f"RATE_LIMIT_{provider.upper()}")
+    if not setting:
+        return DEFAULT_RATE_LIMITS.get(provider, (5, 10))
+
+    values = [float(value) for value in setting.split(",")]
+    return values[0], values[1] if len(values) > 1 else max(1, values[0])
+
+
+def get_rate_limiter(provider, model=None):
+    # One bucket per provider and model, shared by every thread of the process
+    key = (provider, model)
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = TokenBucket(*get_rate_limit(provider))
+        return _rate_limiters[key]
+
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_time = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0, retry_time.timestamp() - time.time())
+
+
+def get_error_status(error):
+    # HTTP status of a requests or googleapiclient error; the nlpcloud client drops the response and
+    # only keeps the "429 Client Error: ..." message
+    response = getattr(error, "response", None)
+    if response is not None:
+        return response.status_code
+    response = getattr(error, "resp", None)
+    if response is not None:
+        return int(response.status)
+    match = re.match(r"\s*(\d{3}) (Client|Server) Error", str(error))
+    return int(match.group(1)) if match else None
+
+
+def get_response_retry_after(response):
+    return parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+
+
+def get_error_retry_after(error):
+    response = getattr(error, "response", None)
+    if response is not None:
+        return get_response_retry_after(response)
+    response = getattr(error, "resp", None)
+    if response is not None:
+        return parse_retry_after(response.get("retry-after"))
+    return None
+
+
+def is_retryable_error(error):
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, TimeoutError)):
+        return True
+    return get_error_status(error) in RETRY_STATUSES
+
+
+def is_unprocessed_request_error(error):
+    # Errors after which the server surely did not act on the request: no connection or throttled.
+    # A read timeout, a dropped connection or a 5xx may come after it did, e.g. after an order was created.
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    return get_error_status(error) == 429
+
+
+def get_retry_delay(attempt, retry_after=None, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+    # Exponential backoff with full jitter, unless the server said how long to wait
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def rate_limited(provider, model=None, retries=DEFAULT_RETRIES, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, is_retryable=is_retryable_error):
+    # Takes a token from the provider's bucket before every call and retries timeouts, connection errors,
+    # 429 and 5xx responses, or only the errors is_retryable accepts for calls that must not run twice.
+    # Used under @cached_result, so cache hits don't use any quota.
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            rate_limiter = get_rate_limiter(provider, model)
+            for attempt in range(retries + 1):
+                rate_limiter.acquire()
+                try:
+                    return function(*args, **kwargs)
+                except Exception as e:
+                    if attempt == retries or not is_retryable(e):
+                        raise
+                    retry_after = get_error_retry_after(e)
+                    delay = get_retry_delay(attempt, retry_after, base_delay, max_delay)
+                    if get_error_status(e) == 429:
+                        rate_limiter.pause(delay)
+                    time.sleep(delay)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,170 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+CACHE_DIRECTORY_NAME = "speech-to-text"
+CACHE_FILE_NAME = "results.sqlite3"
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def get_user_cache_directory():
+    # The platform's per-user cache directory, so the cache doesn't depend on the working directory
+    if sys.platform == "win32":
+        base_directory = os.getenv("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base_directory = os.path.expanduser("~/Library/Caches")
+    else:
+        base_directory = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base_directory, CACHE_DIRECTORY_NAME)
+
+
+def get_default_cache_path():
+    return os.path.join(get_user_cache_directory(), CACHE_FILE_NAME)
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as binary_file:
+        for chunk in iter(lambda: binary_file.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    # Persistent SQLite cache of API results, evicting the least recently used entries
+    # once the stored values grow past max_size_bytes
+    def __init__(self, path=None, max_size_bytes=DEFAULT_CACHE_MAX_BYTES):
+        path = path or get_default_cache_path()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+        self.size_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    @staticmethod
+    def build_key(provider, call_type, model, language, content_hash, options=None):
+        return hash_text(json.dumps([provider, call_type, model, language, content_hash, options or {}],
+                                    sort_keys=True, default=str))
+
+    def get(self, key):
+        # Returns (found, value) so that cached None values are still hits
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+
+            self.hits += 1
+            with self.connection:
+                self.connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            return True, json.loads(row[0])
+
+    def set(self, key, value):
+        serialized_value = json.dumps(value, ensure_ascii=False)
+        size = len(serialized_value.encode("utf-8"))
+        with self.lock:
+            with self.connection:
+                row = self.connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.size_bytes -= row[0]
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, serialized_value, size, time.time()),
+                )
+                self.size_bytes += size
+                self._evict()
+
+    def _evict(self):
+        if self.size_bytes <= self.max_size_bytes:
+            return
+
+        rows = self.connection.execute("SELECT key, size FROM results ORDER BY last_access")
+        evicted_keys = []
+        for key, size in rows:
+            if self.size_bytes <= self.max_size_bytes:
+                break
+            evicted_keys.append((key,))
+            self.size_bytes -= size
+        self.connection.executemany("DELETE FROM results WHERE key = ?", evicted_keys)
+
+    def get_stats(self):
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "size_bytes": self.size_bytes}
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    # Shared cache in the user cache directory, configured with RESULT_CACHE_PATH / RESULT_CACHE_MAX_BYTES,
+    # or None when RESULT_CACHE_DISABLED is set
+    global _result_cache
+    if os.getenv("RESULT_CACHE_DISABLED"):
+        return None
+
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(
+                os.getenv("RESULT_CACHE_PATH") or get_default_cache_path(),
+                int(os.getenv("RESULT_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES)),
+            )
+        return _result_cache
+
+
+def cached_result(call_type, model, language=None, content="text"):
+    # Caches an API classmethod by the SHA-256 of its first argument, which is either
+    # a text or, with content="file", the path of an audio file whose bytes are hashed.
+    # The key also holds the API class and every other argument of the call but callbacks and Nones,
+    # a language argument of the call replaces the default language.
+    def decorator(function):
+        provider = function.__qualname__.split(".")[0]
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(cls, value, *args, **kwargs):
+            result_cache = get_result_cache()
+            if result_cache is None:
+                return function(cls, value, *args, **kwargs)
+
+            arguments = signature.bind(cls, value, *args, **kwargs)
+            arguments.apply_defaults()
+            options = {
+                name: argument for name, argument in list(arguments.arguments.items())[2:]
+                if argument is not None and not callable(argument)
+            }
+            content_hash = hash_file(value) if content == "file" else hash_text(str(value))
+            key = ResultCache.build_key(provider, call_type, model, options.get("language", language), content_hash,
+                                        options)
+            found, result = result_cache.get(key)
+            if found:
+                return result
+
+            result = function(cls, value, *args, **kwargs)
+            result_cache.set(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.rate_limit import get_response_retry_after, get_retry_delay
+from utils.result_cache import get_user_cache_directory
+
+DRIVE_UPLOAD_URL = "https://www.googleapis.com/upload/drive/v3/files"
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # Drive needs chunks in multiples of 256 KiB
+DEFAULT_SESSIONS_PATH = os.path.join(get_user_cache_directory(), "upload_sessions.json")
+DEFAULT_RETRIES = 5
+
+
+def md5_file(file_path, chunk_size=1024 * 1024):
+    file_hash = hashlib.md5()
+    with open(file_path, "rb") as binary_file:
+        for chunk in iter(lambda: binary_file.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+class UploadSessionStore:
+    # Upload sessions saved to disk by file checksum, so an interrupted upload is continued after a restart
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_SESSIONS_PATH
+        self.lock = threading.Lock()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as sessions_file:
+            return json.load(sessions_file)
+
+    def _save(self, sessions):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as sessions_file:
+            json.dump(sessions, sessions_file)
+        os.replace(temporary_path, self.path)
+
+    def get(self, key):
+        with self.lock:
+            return self._load().get(key)
+
+    def set(self, key, session):
+        with self.lock:
+            sessions = self._load()
+            sessions[key] = session
+            self._save(sessions)
+
+    def remove(self, key):
+        with self.lock:
+            sessions = self._load()
+            if sessions.pop(key, None) is not None:
+                self._save(sessions)
+
+
+class ProgressFileReader:
+    # Sized file-like request body that reports every block handed to the HTTP client
+    def __init__(self, file_path, progress_callback=None, block_size=1024 * 1024):
+        self.file = open(file_path, "rb")
+        self.size = os.path.getsize(file_path)
+        self.progress_callback = progress_callback
+        self.block_size = block_size
+        self.sent = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        while True:
+            data = self.read(self.block_size)
+            if not data:
+                break
+            yield data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.file.close()
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.sent += len(data)
+        if data and self.progress_callback:
+            self.progress_callback(self.sent, self.size)
+        return data
+
+
+def _get_next_offset(response):
+    # A 308 answer carries the last byte the server stored as "Range: bytes=0-<last>"
+    range_header = response.headers.get("Range")
+    if not range_header:
+        return 0
+    return int(range_header.rsplit("-", 1)[1]) + 1
+
+
+class ResumableDriveUpload:
+    # Google Drive resumable upload protocol: the file is sent in chunks to an upload session that is
+    # saved on disk, after a failure (or a restart) the server is asked for the last stored byte and the
+    # upload continues from there. The stored file is verified against the local MD5 checksum.
+    def __init__(self, authorized_session, chunk_size=DEFAULT_CHUNK_SIZE, session_store=None,
+                 progress_callback=None, retries=DEFAULT_RETRIES):
+        self.authorized_session = authorized_session
+        self.chunk_size = chunk_size
+        self.session_store = session_store or UploadSessionStore()
+        self.progress_callback = progress_callback
+        self.retries = retries
+
+    def _start_session(self, file_metadata, mime_type, file_size):
+        response = self.authorized_session.post(
+            DRIVE_UPLOAD_URL,
+            params={"uploadType": "resumable", "fields": "id,md5Checksum"},
+            headers={"X-Upload-Content-Type": mime_type, "X-Upload-Content-Length": str(file_size)},
+            json=file_metadata,
+        )
+        if response.status_code != 200:
+            raise Exception("Unable to start Google Drive upload: ", response.status_code, response.text)
+        return response.headers["Location"]
+
+    def _query_offset(self, session_uri, file_size):
+        # Returns the next byte to send, the uploaded file when it is already complete,
+        # or None when the session expired
+        response = self.authorized_session.put(session_uri, headers={"Content-Range": f"bytes */{file_size}"})
+        if response.status_code == 308:
+            return _get_next_offset(response), None
+        if response.status_code in (200, 201):
+            return file_size, response.json()
+        if response.status_code in (404, 410):
+            return None, None
+        raise Exception("Unable to resume Google Drive upload: ", response.status_code, response.text)
+
+    def upload(self, file_path, file_metadata, mime_type):
+        file_size = os.path.getsize(file_path)
+        checksum = md5_file(file_path)
+        key = f"drive:{checksum}:{file_size}:{file_metadata.get('name')}"
+
+        uploaded_file, offset = None, 0
+        session_uri = self.session_store.get(key)
+        if session_uri:
+            offset, uploaded_file = self._query_offset(session_uri, file_size)
+        if offset is None or not session_uri:
+            session_uri = self._start_session(file_metadata, mime_type, file_size)
+            self.session_store.set(key, session_uri)
+            offset = 0
+
+        failures = 0
+        with open(file_path, "rb") as binary_file:
+            while uploaded_file is None:
+                binary_file.seek(offset)
+                chunk = binary_file.read(self.chunk_size)
+                end = offset + len(chunk) - 1
+                try:
+                    response = self.authorized_session.put(
+                        session_uri, data=chunk, headers={"Content-Range": f"bytes {offset}-{end}/{file_size}"}
+                    )
+                except (ConnectionError, OSError):
+                    response = None
+
+                if response is not None and response.status_code in (200, 201):
+                    uploaded_file = response.json()
+                elif response is not None and response.status_code == 308:
+                    offset = _get_next_offset(response)
+                    failures = 0
+                elif response is None or response.status_code >= 500 or response.status_code == 429:
+                    # Ask the server where to continue instead of resending what it already has
+                    failures += 1
+                    if failures > self.retries:
+                        raise Exception("Google Drive upload failed after retries", file_path)
+                    time.sleep(get_retry_delay(failures, get_response_retry_after(response)))
+                    offset, uploaded_file = self._query_offset(session_uri, file_size)
+                    if offset is None:
+                        self.session_store.remove(key)
+                        raise Exception("Google Drive upload session expired", file_path)
+                else:
+                    raise Exception("Unable to upload file to Google Drive: ", response.status_code, response.text)
+
+                if self.progress_callback:
+                    self.progress_callback(file_size if uploaded_file else offset, file_size)
+
+        self.session_store.remove(key)
+        if uploaded_file.get("md5Checksum") and uploaded_file["md5Checksum"] != checksum:
+            raise Exception("Checksum mismatch after Google Drive upload", file_path)
+        return uploaded_file
+
+
+def upload_to_presigned_url(http_session, upload_url, file_path, progress_callback=None, retries=DEFAULT_RETRIES,
+                            timeout=None):
+    # Pre-signed PUT URLs only take the whole object, so a failed upload is retried as a whole.
+    # The returned ETag of a single PUT is the MD5 of the object and is checked against the local file.
+    checksum = md5_file(file_path)
+    for attempt in range(retries + 1):
+        try:
+            with ProgressFileReader(file_path, progress_callback) as file_data:
+                # The upload URL is pre-signed, the API headers must not be sent along
+                response = http_session.put(
+                    upload_url, data=file_data,
+                    headers={"Authorization": None, "Content-Type": None, "Accept": None},
+                    timeout=timeout,
+                )
+        except (ConnectionError, OSError):
+            response = None
+
+        if response is not None and response.status_code == 200:
+            etag = response.headers.get("ETag", "").strip('"')
+            if etag and "-" not in etag and etag != checksum:
+                raise Exception("Checksum mismatch after upload", file_path)
+            return response
+        if response is not None and response.status_code < 500 and response.status_code != 429:
+            raise Exception("Unable to upload sound file", response.status_code)
+        if attempt < retries:
+            time.sleep(get_retry_delay(attempt, get_response_retry_after(response)))
+
+    raise Exception("Unable to upload sound file after retries", file_path)
@@ -1,10 +1,101 @@
-from sinatools.morphology import morph_analyzer
-from sinatools.utils.parser import arStrip
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.lemma_cache import get_lemma_cache
+from utils.text_segmentation import split_into_shards
+
+# Shorter texts are not worth sending to more than one worker
+MIN_SHARD_CHARS = 1000
+# Every worker process loads its own dictionaries and torch
+DEFAULT_PROCESSES = 4
+
+
+def get_default_processes():
+    return min(DEFAULT_PROCESSES, os.cpu_count() or 1)
+
+
+def _init_sinatools_worker():
+    # sinatools loads its dictionaries (and torch) on import, once per worker process
+    import sinatools.morphology.morph_analyzer
+    import sinatools.utils.parser
+
+
+def _lemmatize(text):
+    from sinatools.morphology import morph_analyzer
+    from sinatools.utils.parser import arStrip
+
+    # Morphological analysis
+    analyzed_text = morph_analyzer.analyze(text=text, task='lemmatization')
+    return [arStrip(text=text['lemma']) for text in analyzed_text]
 
 
 class SinaToolsApi:
+    # With processes > 1 lemmatization runs in a long-lived pool of worker processes that load SinaTools
+    # once, long texts are split at sentence boundaries across the workers and merged back in order.
+    # Otherwise it runs in this process, with sinatools only imported on first use.
+    processes = 1
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, processes):
+        with cls._executor_lock:
+            cls.processes = max(1, min(processes, os.cpu_count() or 1))
+            if cls._executor is not None:
+                cls._executor.shutdown()
+                cls._executor = None
+
+    @classmethod
+    def get_executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                # Spawned, not forked, like the whisper workers
+                cls._executor = ProcessPoolExecutor(max_workers=cls.processes, initializer=_init_sinatools_worker,
+                                                    mp_context=multiprocessing.get_context("spawn"))
+            return cls._executor
+
+    @classmethod
+    def warm_up(cls):
+        if cls.processes == 1:
+            _init_sinatools_worker()
+            return
+
+        # Starts the workers, so the dictionaries are loaded before the first text
+        executor = cls.get_executor()
+        for future in [executor.submit(_init_sinatools_worker) for _ in range(cls.processes)]:
+            future.result()
+
+    @classmethod
+    def analyze(cls, text):
+        if cls.processes == 1:
+            return _lemmatize(text)
+
+        shards = split_into_shards(text, cls.processes, MIN_SHARD_CHARS)
+        return [lemma for lemmas in cls.get_executor().map(_lemmatize, shards) for lemma in lemmas]
+
     @classmethod
     def get_lemmas(cls, text):
-        # Morphological analysis
-        analyzed_text = morph_analyzer.analyze(text=text, task='lemmatization')
-        return [arStrip(text=text['lemma']) for text in analyzed_text]
+        lemma_cache = get_lemma_cache()
+        if lemma_cache is None:
+            return cls.analyze(text)
+
+        # Same tokenization as morph_analyzer, only tokens missing from the cache are analyzed,
+        # one per line so they can still be sharded across the workers. Tokens are cached exactly as
+        # the analyzer gets them: folded spellings (e.g. without diacritics) can have other lemmas.
+        from sinatools.utils.tokenizers_words import simple_word_tokenize
+
+        tokens = simple_word_tokenize(text)
+        lemmas = lemma_cache.get_many(tokens)
+        missing_tokens = list(dict.fromkeys(token for token in tokens if token not in lemmas))
+        if missing_tokens:
+            missing_lemmas = cls.analyze("\n".join(missing_tokens))
+            if len(missing_lemmas) != len(missing_tokens):
+                # A token the analyzer splits differently on its own, analyze the text as a whole
+                return cls.analyze(text)
+            new_lemmas = dict(zip(missing_tokens, missing_lemmas))
+            lemma_cache.set_many(new_lemmas)
+            lemmas.update(new_lemmas)
+
+        return [lemmas[token] for token in tokens]
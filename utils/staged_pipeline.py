@@ -0,0 +1,93 @@
+import queue
+import threading
+
+_STOP = object()
+
+
+class PipelineStage:
+    def __init__(self, name, handler, workers=1):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+
+
+class PipelineJob:
+    def __init__(self, item, data):
+        self.item = item
+        self.data = data
+        self.error = None
+        self.failed_stage = None
+
+
+class StagedPipeline:
+    # Every stage has its own worker threads, connected to the next stage by a bounded queue,
+    # so file N can be lemmatized while file N+1 is summarized and file N+2 is transcribed.
+    # Handlers receive the job data dict and update it in place.
+    def __init__(self, stages, queue_size=4):
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, items, build_data=None):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        output_queue = queue.Queue()
+        threads = []
+
+        for index, stage in enumerate(self.stages):
+            next_queue = queues[index + 1] if index + 1 < len(self.stages) else output_queue
+            next_workers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            remaining_workers = [stage.workers]
+            lock = threading.Lock()
+            for worker_number in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._run_worker,
+                    args=(stage, queues[index], next_queue, next_workers, remaining_workers, lock),
+                    name=f"{stage.name}-{worker_number}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        feeder = threading.Thread(target=self._feed, args=(items, build_data, queues[0]), daemon=True)
+        feeder.start()
+
+        while True:
+            job = output_queue.get()
+            if job is _STOP:
+                break
+            yield job
+
+        feeder.join()
+        for thread in threads:
+            thread.join()
+
+    def _feed(self, items, build_data, first_queue):
+        for item in items:
+            data = build_data(item) if build_data else {}
+            first_queue.put(PipelineJob(item, data))
+
+        for _ in range(self.stages[0].workers):
+            first_queue.put(_STOP)
+
+    @staticmethod
+    def _run_worker(stage, input_queue, next_queue, next_workers, remaining_workers, lock):
+        while True:
+            job = input_queue.get()
+            if job is _STOP:
+                break
+
+            # Failed jobs skip the remaining stages but still reach the output
+            if job.error is None:
+                try:
+                    stage.handler(job.data)
+                except Exception as e:
+                    job.error = e
+                    job.failed_stage = stage.name
+            next_queue.put(job)
+
+        # The last worker of a stage to finish tells the next stage to stop
+        with lock:
+            remaining_workers[0] -= 1
+            is_last_worker = remaining_workers[0] == 0
+        if is_last_worker:
+            for _ in range(next_workers):
+                next_queue.put(_STOP)
@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.nlp_cloud_api import NLPCloudApi
+from utils.text_segmentation import estimate_tokens, split_into_sections
+
+# Estimated tokens per summarization request, well inside the model's context window
+DEFAULT_SECTION_TOKENS = 2000
+DEFAULT_SECTION_WORKERS = 8
+MAX_REDUCE_ROUNDS = 4
+
+
+def summarize_long_text(text, section_tokens=DEFAULT_SECTION_TOKENS, workers=DEFAULT_SECTION_WORKERS):
+    # Map-reduce summary: a transcript over the token budget is split into sections of whole sentences,
+    # the sections are summarized concurrently and their summaries are summarized again, until
+    # everything fits in one final request. Every request goes through the cached, rate limited API.
+    for _ in range(MAX_REDUCE_ROUNDS):
+        text_tokens = estimate_tokens(text)
+        if text_tokens <= section_tokens:
+            break
+
+        sections = split_into_sections(text, section_tokens, estimate_tokens)
+        with ThreadPoolExecutor(max_workers=min(workers, len(sections))) as executor:
+            section_summaries = list(executor.map(NLPCloudApi.generate_summary_from_text, sections))
+        text = "\n".join(section_summaries)
+        if estimate_tokens(text) >= text_tokens:
+            raise Exception("Section summaries are not shorter than their sections", text_tokens)
+
+    # The final request never goes over the budget
+    if estimate_tokens(text) > section_tokens:
+        raise Exception(f"Summaries still over {section_tokens} tokens after {MAX_REDUCE_ROUNDS} rounds",
+                        estimate_tokens(text))
+    return NLPCloudApi.generate_summary_from_text(text)
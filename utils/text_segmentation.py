@@ -0,0 +1,101 @@
+import re
+
+# Latin and Arabic sentence endings, a run of them ("...", "؟!") ends one sentence
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?؟\n])(?![.!?؟\n])")
+WORD_PATTERN = re.compile(r"(\S+)(\s*)")
+SPAN_PATTERN = re.compile(r"(.*?)(\s*)$", re.DOTALL)
+# Rough LLM tokens per Arabic word, used to budget requests without a tokenizer
+TOKENS_PER_WORD = 2
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in SENTENCE_END_PATTERN.split(text) if sentence.strip()]
+
+
+def estimate_tokens(text):
+    return len(text.split()) * TOKENS_PER_WORD
+
+
+def split_long_sentence(sentence, max_size, get_size=len):
+    # Transcripts without punctuation come as one huge "sentence", those are cut between words
+    parts = []
+    part, part_size = [], 0
+    for word in sentence.split():
+        word_size = get_size(word)
+        if part and part_size + word_size > max_size:
+            parts.append(" ".join(part))
+            part, part_size = [], 0
+        part.append(word)
+        part_size += word_size
+    if part:
+        parts.append(" ".join(part))
+    return parts
+
+
+def pack_sentences(sentences, max_size, get_size=len):
+    # Groups consecutive sentences into sections of at most max_size (a longer sentence gets its own section)
+    sections = []
+    section, section_size = [], 0
+    for sentence in sentences:
+        sentence_size = get_size(sentence)
+        if section and section_size + sentence_size > max_size:
+            sections.append(" ".join(section))
+            section, section_size = [], 0
+        section.append(sentence)
+        section_size += sentence_size
+    if section:
+        sections.append(" ".join(section))
+    return sections
+
+
+def split_into_shards(text, shards, min_shard_size=1):
+    # Splits a text at sentence boundaries into about `shards` sections of similar length
+    sentences = split_sentences(text)
+    shards = max(1, min(shards, len(text) // max(1, min_shard_size)))
+    return pack_sentences(sentences, len(text) / shards)
+
+
+def split_bounded_sentences(text, max_size, get_size=len):
+    # Sentences of the text, the ones longer than max_size cut between words
+    sentences = []
+    for sentence in split_sentences(text):
+        if get_size(sentence) > max_size:
+            sentences.extend(split_long_sentence(sentence, max_size, get_size))
+        else:
+            sentences.append(sentence)
+    return sentences
+
+
+def split_into_sections(text, max_size, get_size=len):
+    # Sections of whole sentences within max_size
+    return pack_sentences(split_bounded_sentences(text, max_size, get_size), max_size, get_size)
+
+
+def split_sentence_spans(text, max_size, get_size=len):
+    # Same sentences as split_bounded_sentences, each with the whitespace that follows it in the text,
+    # so "".join(sentence + separator) gives the text back with its newlines and spacing
+    spans = []
+    for piece in SENTENCE_END_PATTERN.split(text):
+        # A piece starts with the whitespace after the previous sentence
+        leading_space = piece[:len(piece) - len(piece.lstrip())]
+        if spans:
+            spans[-1][1] += leading_space
+        sentence, separator = SPAN_PATTERN.match(piece.lstrip()).groups()
+        if not sentence:
+            continue
+        if get_size(sentence) <= max_size:
+            spans.append([sentence, separator])
+            continue
+
+        # Cut between words, every part keeps the spacing after its last word
+        part_start = part_size = 0
+        words = list(WORD_PATTERN.finditer(sentence))
+        for index, word in enumerate(words):
+            word_size = get_size(word.group(1))
+            if part_size and part_size + word_size > max_size:
+                previous_word = words[index - 1]
+                spans.append([sentence[part_start:previous_word.end(1)], previous_word.group(2)])
+                part_start, part_size = word.start(), 0
+            part_size += word_size
+        spans.append([sentence[part_start:], separator])
+    return [tuple(span) for span in spans]
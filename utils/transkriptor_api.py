@@ -1,72 +1,140 @@
 import json
 import os
+import threading
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils.audio_preprocessing import DEFAULT_AUDIO_FORMAT, prepared_audio_file
+from utils.rate_limit import RETRY_STATUSES, is_unprocessed_request_error, rate_limited
+from utils.result_cache import cached_result
+from utils.resumable_upload import UploadSessionStore, md5_file, upload_to_presigned_url
+
+
+class OrderStillProcessingError(Exception):
+    pass
+
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (10, 60)  # (connect, read) seconds
+DEFAULT_LANGUAGE = "en-US"
 
 
 class TranskriptorApi:
+    # All calls share one keep-alive session: connections to api.tor.app are reused instead of
+    # paying a new TCP + TLS handshake per call, and at most pool_size of them are open at once
+    pool_size = DEFAULT_POOL_SIZE
+    timeout = DEFAULT_TIMEOUT
+    _session = None
+    _session_lock = threading.Lock()
+    upload_sessions = UploadSessionStore()
+
     @classmethod
-    def transcribe_using_google_drive_url(google_drive_url):
-        url = "https://api.tor.app/developer/transcription/url"
+    def configure(cls, pool_size=None, timeout=None):
+        with cls._session_lock:
+            if pool_size is not None:
+                cls.pool_size = pool_size
+            if timeout is not None:
+                cls.timeout = timeout
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
 
-        # Replace with your actual API key
-        api_key = os.getenv("TRANSKRIPTOR_TOKEN")
+    @classmethod
+    def get_session(cls):
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=cls.pool_size, pool_block=True)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {os.getenv('TRANSKRIPTOR_TOKEN')}",
+                    "Accept": "application/json",
+                })
+                cls._session = session
+            return cls._session
 
-        # Set up the headers, including the API key
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "application/json",
-        }
+    @classmethod
+    def send(cls, method, url, **kwargs):
+        kwargs.setdefault("timeout", cls.timeout)
+        response = cls.get_session().request(method, url, **kwargs)
+        if response.status_code in RETRY_STATUSES:
+            response.raise_for_status()
+        return response
+
+    # Every API call goes through here: rate limited, with timeouts, throttled (429) and 5xx answers retried
+    @classmethod
+    @rate_limited("transkriptor")
+    def request(cls, method, url, **kwargs):
+        return cls.send(method, url, **kwargs)
+
+    # Calls that create an order, which a resent request would create (and bill) twice.
+    # They are only retried when the server surely did not get them.
+    @classmethod
+    @rate_limited("transkriptor", is_retryable=is_unprocessed_request_error)
+    def create_order(cls, url, **kwargs):
+        return cls.send("POST", url, **kwargs)
+
+    @classmethod
+    @cached_result("transcription_url", "Standard")
+    def transcribe_using_google_drive_url(cls, google_drive_url, language=DEFAULT_LANGUAGE):
+        url = "https://api.tor.app/developer/transcription/url"
 
         # Here, adjust the url, service, language, and optionally folder_id and file_name
         config = json.dumps(
             {
                 "url": google_drive_url,
                 "service": "Standard",
-                "language": "en-US",
+                "language": language,
                 "folder_id": "support",  # optional folder_id
                 # "file_name": "example",  # optional file_name
             }
         )
 
-        response = requests.post(url, headers=headers, data=config)
+        response = cls.create_order(url, data=config)
         response_json = response.json()
 
         # This is your order ID to check the status of the transcription
         return response_json["order_id"]
 
     @classmethod
-    def transcribe_local_file(cls, file_path):
-        # Step 1: Obtain the Upload URL
-        url = "https://api.tor.app/developer/transcription/local_file/get_upload_url"
-
-        # Replace with your actual API key
-        api_key = os.getenv("TRANSKRIPTOR_TOKEN")
-
-        # Set up the headers, including the API key
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "application/json",
-        }
-
-        # Request body with the file name
-        body = json.dumps({"file_name": "Sound file"})
-
-        # Request to get the upload URL
-        response = requests.post(url, headers=headers, data=body)
-        if response.status_code != 200:
-            raise Exception("Unable to get response of transkriptor url: ", response.status_code, response.text)
-        response_json = response.json()
-        upload_url = response_json["upload_url"]
-        public_url = response_json["public_url"]
-
-        # Step 2: Upload the Local File
-        with open(file_path, "rb") as file_data:
-            upload_response = requests.put(upload_url, data=file_data)
-            if upload_response.status_code != 200:
-                raise Exception("Unable to upload sound file")
+    @cached_result("transcription_local_file", "Standard", content="file")
+    def transcribe_local_file(cls, file_path, audio_format=DEFAULT_AUDIO_FORMAT, progress_callback=None,
+                              language=DEFAULT_LANGUAGE):
+        with prepared_audio_file(file_path, audio_format) as prepared_file_path:
+            # Uploads are remembered by checksum, a retried file skips the parts that already succeeded
+            session_key = f"transkriptor:{md5_file(prepared_file_path)}"
+            upload_session = cls.upload_sessions.get(session_key)
+
+            if upload_session is None:
+                # Step 1: Obtain the Upload URL
+                url = "https://api.tor.app/developer/transcription/local_file/get_upload_url"
+
+                # Request body with the file name
+                body = json.dumps({"file_name": "Sound file"})
+
+                # Request to get the upload URL
+                response = cls.request("POST", url, data=body)
+                if response.status_code != 200:
+                    raise Exception("Unable to get response of transkriptor url: ", response.status_code,
+                                    response.text)
+                response_json = response.json()
+                upload_session = {
+                    "upload_url": response_json["upload_url"],
+                    "public_url": response_json["public_url"],
+                    "uploaded": False,
+                }
+                cls.upload_sessions.set(session_key, upload_session)
+
+            # Step 2: Upload a 16 kHz mono copy of the Local File
+            if not upload_session["uploaded"]:
+                upload_to_presigned_url(cls.get_session(), upload_session["upload_url"], prepared_file_path,
+                                        progress_callback, timeout=cls.timeout)
+                upload_session["uploaded"] = True
+                cls.upload_sessions.set(session_key, upload_session)
+        public_url = upload_session["public_url"]
 
         # Step 3: Initiate Transcription for the Uploaded File
         initiate_url = (
@@ -77,7 +145,7 @@ class TranskriptorApi:
         config = json.dumps(
             {
                 "url": public_url,  # Passing public_url to initiate transcription
-                "language": "en-US",
+                "language": language,
                 "service": "Standard",
                 # "folder_id": "your_folder_id",  # Optional folder_id
                 # "triggering_word": "example",  # Optional triggering_word
@@ -85,52 +153,43 @@ class TranskriptorApi:
         )
 
         # Send request to initiate transcription
-        transcription_response = requests.post(initiate_url, headers=headers, data=config)
-        if transcription_response.status_code != '202':
+        transcription_response = cls.create_order(initiate_url, data=config)
+        if transcription_response.status_code != 202:
             raise Exception("Failed to transcribe file")
 
         transcription_json = transcription_response.json()
+        cls.upload_sessions.remove(session_key)
         return transcription_json['order_id']
 
+    # Only completed orders are cached, pending ones raise before reaching the cache
     @classmethod
+    @cached_result("order_status", "Standard")
     def get_order_status(cls, order_id):
-        api_key = os.getenv("TRANSKRIPTOR_TOKEN")
-
-        # Set up the headers, including the API key
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {api_key}',
-            'Accept': 'application/json'
-        }
-
         url = f"https://api.tor.app/developer/files/{order_id}/content"
 
-        response = requests.get(url, headers=headers)
+        response = cls.request("GET", url)
         response_json = response.json()
         if response.status_code in [400, 500, 404]:
             raise Exception(f"Error fetching order status: {response.status_code} - {response_json['message']}")
 
         if response_json['body']['status'] == 'Processing':
-            raise Exception("Order is still processing")
+            raise OrderStillProcessingError("Order is still processing")
 
         return response_json
 
+    @classmethod
+    def get_transcript_text(cls, order_status):
+        # Joins the transcribed sentences of a completed order returned by get_order_status
+        body = order_status.get("body", order_status)
+        content = body.get("content", "")
+        if isinstance(content, list):
+            return " ".join(sentence["text"] for sentence in content)
+        return content
+
     # Export format : Choose the export format: Txt, Srt, Pdf, or Docx
     @classmethod
     def register_webhook(cls, webhook_url, folder_id=None, export_format='Pdf'):
-        import requests
-        import json
-
         url = "https://api.tor.app/developer/integrations/webhooks/transcription_completed"
-        api_key = os.getenv("TRANSKRIPTOR_TOKEN")
-
-        # Set up the headers, including the API key
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "application/json",
-        }
-
         # Define the request body parameters
         # If you specify a folder_id, the webhook will only be triggered for transcriptions in that folder
         # If you do not specify a folder_id, the webhook will be triggered for the transcriptions in "Recent Files" folder
@@ -147,6 +206,6 @@ class TranskriptorApi:
             body["folder_id"] = folder_id
 
         # Send the POST request
-        response = requests.post(url, headers=headers, data=json.dumps(body))
+        response = cls.request("POST", url, data=json.dumps(body))
 
         return response.json()
@@ -1,12 +1,13 @@
+import base64
 import json
 import os
 
-from pydub import AudioSegment
+from utils.audio_probe import probe_audio
 
 
 def get_audio_duration(file_path):
-    audio = AudioSegment.from_file(file_path)
-    duration_seconds = audio.duration_seconds
+    # Read from the file headers, the audio itself is never decoded
+    duration_seconds = probe_audio(file_path).duration_ms / 1000
 
     return duration_seconds
 
@@ -15,3 +16,70 @@ def save_result_to_local_file(path, data):
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", encoding="utf-8") as result_file:
         json.dump(data, result_file, ensure_ascii=False, indent=4)
+
+
+class Base64JsonBody:
+    # File-like JSON request body that base64-encodes the file while it is being sent,
+    # so only one small buffer of the audio is held in memory instead of the whole file
+    # (raw bytes, base64 bytes and decoded str)
+    def __init__(self, file_path, field_name, extra_fields=None, chunk_size=3 * 64 * 1024):
+        extra_fields = extra_fields or {}
+        prefix = "{" + "".join(f"{json.dumps(key)}: {json.dumps(value)}, " for key, value in extra_fields.items())
+        self.prefix = (prefix + json.dumps(field_name) + ': "').encode("utf-8")
+        self.suffix = b'"}'
+        # base64 needs input in multiples of 3 bytes to be encoded chunk by chunk without padding
+        self.chunk_size = chunk_size - chunk_size % 3 or 3
+        self.file_size = os.path.getsize(file_path)
+        self.file = open(file_path, "rb")
+        self.buffer = self.prefix
+        self.position = 0
+        self.finished = False
+
+    def __len__(self):
+        encoded_size = 4 * ((self.file_size + 2) // 3)
+        return len(self.prefix) + encoded_size + len(self.suffix)
+
+    def __iter__(self):
+        while True:
+            data = self.read(self.chunk_size)
+            if not data:
+                break
+            yield data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _fill_buffer(self):
+        if self.finished:
+            return False
+
+        raw_data = self.file.read(self.chunk_size)
+        if raw_data:
+            self.buffer = base64.b64encode(raw_data)
+        else:
+            self.buffer = self.suffix
+            self.finished = True
+        self.position = 0
+        return True
+
+    def read(self, size=-1):
+        read_all = size is None or size < 0
+        chunks = []
+        while read_all or size > 0:
+            if self.position >= len(self.buffer) and not self._fill_buffer():
+                break
+
+            end = len(self.buffer) if read_all else self.position + size
+            chunk = self.buffer[self.position:end]
+            self.position += len(chunk)
+            chunks.append(chunk)
+            if not read_all:
+                size -= len(chunk)
+
+        return b"".join(chunks)
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,60 @@
+import numpy as np
+
+DEFAULT_FRAME_MS = 30
+
+
+def get_frame_features(audio, frame_ms=DEFAULT_FRAME_MS):
+    # Energy (dBFS) and zero-crossing rate of every frame, computed over all frames at once
+    samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
+    if audio.channels > 1:
+        samples = samples.reshape(-1, audio.channels).mean(axis=1)
+    samples /= float(1 << (8 * audio.sample_width - 1))
+
+    frame_length = max(1, int(audio.frame_rate * frame_ms / 1000))
+    frame_count = len(samples) // frame_length
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    energy_db = 20 * np.log10(rms + 1e-10)
+    zero_crossing_rate = np.mean(np.diff(np.signbit(frames), axis=1), axis=1)
+    return energy_db, zero_crossing_rate
+
+
+def _get_runs(mask):
+    # (start, end) frame indexes of every run of True values
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def get_speech_segments(audio, frame_ms=DEFAULT_FRAME_MS, threshold_db=None, noise_margin_db=12,
+                        max_zero_crossing_rate=0.3, min_speech_ms=250, min_silence_ms=600, padding_ms=200):
+    # Returns (start_ms, end_ms) of every voiced stretch of the audio. Frames are voiced when their energy is
+    # above the threshold (by default the noise floor plus noise_margin_db). Frames just above it with a
+    # noise-like zero-crossing rate are rejected, pauses shorter than min_silence_ms are bridged and
+    # bursts shorter than min_speech_ms are dropped.
+    energy_db, zero_crossing_rate = get_frame_features(audio, frame_ms)
+    if not len(energy_db):
+        return []
+
+    if threshold_db is None:
+        threshold_db = max(np.percentile(energy_db, 10) + noise_margin_db, -60)
+    voiced = (energy_db > threshold_db) & (
+        (zero_crossing_rate < max_zero_crossing_rate) | (energy_db > threshold_db + noise_margin_db)
+    )
+
+    starts, ends = _get_runs(voiced)
+    if not len(starts):
+        return []
+
+    # Bridge short pauses between voiced runs
+    gaps = starts[1:] - ends[:-1]
+    keep_boundary = gaps * frame_ms >= min_silence_ms
+    starts = np.concatenate((starts[:1], starts[1:][keep_boundary]))
+    ends = np.concatenate((ends[:-1][keep_boundary], ends[-1:]))
+
+    long_enough = (ends - starts) * frame_ms >= min_speech_ms
+    duration_ms = len(audio)
+    return [
+        (int(max(0, start * frame_ms - padding_ms)), int(min(duration_ms, end * frame_ms + padding_ms)))
+        for start, end in zip(starts[long_enough], ends[long_enough])
+    ]
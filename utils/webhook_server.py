@@ -0,0 +1,126 @@
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+MAX_BODY_BYTES = 1024 * 1024
+HTTP_STATUSES = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+def get_webhook_order_id(payload):
+    # The completed transcription is identified by its order/file id
+    for key in ("order_id", "file_id", "id"):
+        if payload.get(key) not in (None, ""):
+            return str(payload[key])
+
+    body = payload.get("body")
+    return get_webhook_order_id(body) if isinstance(body, dict) else None
+
+
+class TranskriptorWebhookServer:
+    # Small asyncio HTTP server for Transkriptor "transcription_completed" webhooks. A callback is
+    # acknowledged right away and queued; workers then fetch the finished order once and resolve it in
+    # the OrderTracker, whose completed() loop hands it to the downstream stages. Polling stays as the
+    # fallback for callbacks that never arrive. Only local connections are accepted unless another host
+    # is given, e.g. "0.0.0.0" together with a secret.
+    def __init__(self, order_tracker, host="127.0.0.1", port=8080, path="/transkriptor/webhook", secret=None,
+                 workers=8):
+        self.order_tracker = order_tracker
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self.workers = workers
+        self.server = None
+        self.callbacks = None
+        self.worker_tasks = []
+
+    async def start(self):
+        self.callbacks = asyncio.Queue()
+        self.worker_tasks = [asyncio.create_task(self._process_callbacks()) for _ in range(self.workers)]
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for worker_task in self.worker_tasks:
+            worker_task.cancel()
+        self.worker_tasks = []
+
+    async def _handle_connection(self, reader, writer):
+        # HTTP/1.1 with keep-alive, so bursts of callbacks can reuse one connection
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                content_length = int(headers.get("content-length", 0))
+                if content_length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413)
+                    break
+                body = await reader.readexactly(content_length)
+
+                await self._respond(writer, self._handle_request(method, target, body))
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status):
+        writer.write(f"HTTP/1.1 {status} {HTTP_STATUSES[status]}\r\nContent-Length: 0\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+
+    def _handle_request(self, method, target, body):
+        url = urlsplit(target)
+        if url.path != self.path:
+            return 404
+        if method != "POST":
+            return 405
+        if self.secret and parse_qs(url.query).get("token", [None])[0] != self.secret:
+            return 403
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400
+        order_id = get_webhook_order_id(payload) if isinstance(payload, dict) else None
+        if order_id is None:
+            return 400
+
+        self.callbacks.put_nowait(order_id)
+        return 200
+
+    async def _process_callbacks(self):
+        while True:
+            order_id = await self.callbacks.get()
+            # Callbacks for unknown or already finished orders are ignored
+            if order_id not in self.order_tracker.pending:
+                continue
+
+            try:
+                order_status = await asyncio.to_thread(self.order_tracker.fetch_order_status, order_id)
+            except Exception:
+                # Leave the order to the tracker's own polling
+                continue
+            self.order_tracker.resolve_order(order_id, order_status)